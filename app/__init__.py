@@ -32,6 +32,13 @@ def create_app(config_class=Config):
     login.init_app(app)
     mail.init_app(app)
 
+    from app.cache import init_cache
+    from app.events import init_events
+    from app.scans import init_scans
+    init_cache(app)
+    init_events(app)
+    init_scans(app)
+
     # Register Blueprints
     from app.main.routes import bp as main_bp
     from app.auth.routes import bp as auth_bp
@@ -51,6 +58,16 @@ def create_app(config_class=Config):
     app.register_blueprint(reports_bp, url_prefix='/reports')
     app.register_blueprint(admin_bp, url_prefix='/admin')
 
+    from app.reports.jobs import report_jobs
+    report_jobs.init_app(app)
+
+    from app.qr import qr_cache
+    qr_cache.init_app(app)
+
+    # Register CLI commands
+    from app.cli import register_commands
+    register_commands(app)
+
     # Start APScheduler and auto-apply migrations
     with app.app_context():
         start_scheduler()
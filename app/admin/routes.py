@@ -1,7 +1,9 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
 from app import db
-from app.models import User, Asset, Stationery, Maintenance, Checkout
+from app.models import User
+from app.dashboard import DashboardStats
+from app.cache import dashboard_cache
 from app.admin.forms import AddUserForm, EditUserForm
 from werkzeug.security import generate_password_hash
 from functools import wraps
@@ -114,34 +116,16 @@ def delete_user(id):
 @admin_only
 def send_dashboard_email():
     try:
-        # Collect asset type counts
-        asset_counts = {
-            'desktop': Asset.query.filter_by(asset_type='Desktop').count(),
-            'printer': Asset.query.filter_by(asset_type='Printer').count(),
-            'server': Asset.query.filter_by(asset_type='Server').count(),
-            'other': Asset.query.filter(Asset.asset_type.notin_(['Desktop', 'Printer', 'Server'])).count()
-        }
-
-        # Collect status counts
-        statuses = ['Available', 'In-use', 'Maintenance', 'Out of Service']
-        status_counts = {status: Asset.query.filter_by(status=status).count() for status in statuses}
-
-        # Low stock stationery
-        low_stock = Stationery.query.filter(Stationery.quantity < Stationery.threshold).all()
-
-        # Pending actions
-        pending_maintenance = Maintenance.query.filter_by(status='Pending').count()
-        active_checkouts = Checkout.query.filter_by(status='Checked Out').count()
-
-        # Send email
-        send_dashboard_report_email(
-            asset_counts=asset_counts,
-            status_counts=status_counts,
-            low_stock=low_stock,
-            pending_maintenance=pending_maintenance,
-            active_checkouts=active_checkouts
-        )
+        stats = DashboardStats.cached()
+        send_dashboard_report_email(**stats.as_context())
 
         return jsonify({'success': True})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
+
+# Dashboard cache hit/miss counters for this worker
+@bp.route('/cache-stats')
+@login_required
+@admin_only
+def cache_stats():
+    return jsonify(dashboard_cache.stats())
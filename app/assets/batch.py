@@ -0,0 +1,188 @@
+from datetime import datetime
+
+from app import db
+from app.models import (
+    Asset, AssetTransfer, Checkout, Maintenance,
+    apply_counter_deltas, bump_data_version, COUNTED_ATTRIBUTES
+)
+from app.events import queue_resync
+from app.assets.forms import AssetForm, TransferAssetForm
+from app.assets.tree import MAX_TREE_DEPTH
+
+# Largest explicit id list one request may carry; use a filter for more
+MAX_BATCH_IDS = 5000
+
+# Ids past a signed 64-bit integer cannot be bound as query parameters
+MAX_ID = 2 ** 63
+
+# Columns a batch may be selected by, besides an explicit id list
+FILTER_COLUMNS = ('location', 'asset_type', 'status')
+
+STATUS_CHOICES = [value for value, _ in AssetForm.status.kwargs['choices']]
+LOCATION_CHOICES = [value for value, _ in TransferAssetForm.to_location.kwargs['choices']]
+
+
+class BatchError(ValueError):
+    """A batch request that cannot be applied; the message is shown to the client."""
+
+
+def selection(data):
+    """WHERE clause for {'ids': [...]} or {'filter': {'location': ..., 'asset_type': ...}}."""
+    ids = data.get('ids')
+    filters = data.get('filter')
+    if ids is not None:
+        if not isinstance(ids, list) or not all(
+            isinstance(i, int) and not isinstance(i, bool) and 0 < i < MAX_ID for i in ids
+        ):
+            raise BatchError('ids must be a list of positive 64-bit integers')
+        if not ids:
+            raise BatchError('ids is empty')
+        if len(ids) > MAX_BATCH_IDS:
+            raise BatchError(f'At most {MAX_BATCH_IDS} ids per request; select by filter instead')
+        return Asset.id.in_(set(ids))
+    if isinstance(filters, dict) and filters:
+        unknown = [key for key in filters if key not in FILTER_COLUMNS]
+        if unknown:
+            raise BatchError(f"Unknown filter(s): {', '.join(unknown)}")
+        invalid = [key for key, value in filters.items()
+                   if value is not None and not isinstance(value, str)]
+        if invalid:
+            raise BatchError(f"Filter value(s) must be strings or null: {', '.join(invalid)}")
+        return db.and_(*(getattr(Asset, key) == value for key, value in filters.items()))
+    raise BatchError("Give either 'ids' or a non-empty 'filter'")
+
+
+def _counter_deltas(where, changes=None):
+    """Counter deltas for the rows matching where, from one grouped SELECT.
+
+    With changes ({attr: new value}) each row moves from its old counter
+    keys to its new ones; without, the rows are being deleted.
+    """
+    attrs = [attr for _, attr, _ in COUNTED_ATTRIBUTES[Asset]]
+    rows = db.session.execute(
+        db.select(*(getattr(Asset, attr) for attr in attrs), db.func.count(Asset.id))
+        .where(where).group_by(*(getattr(Asset, attr) for attr in attrs))
+    ).all()
+
+    deltas = {}
+    for row in rows:
+        old = dict(zip(attrs, row))
+        new = dict(old, **changes) if changes is not None else None
+        for dimension, attr, to_value in COUNTED_ATTRIBUTES[Asset]:
+            old_key = (dimension, to_value(old[attr]) or '')
+            deltas[old_key] = deltas.get(old_key, 0) - row[-1]
+            if new is not None:
+                new_key = (dimension, to_value(new[attr]) or '')
+                deltas[new_key] = deltas.get(new_key, 0) + row[-1]
+    return deltas
+
+
+def _finish(deltas, reason):
+    """Record a set-based change: counters, data version and a dashboard resync."""
+    connection = db.session.connection()
+    apply_counter_deltas(connection, deltas)
+    bump_data_version(connection)
+    queue_resync(db.session, reason)
+    db.session.commit()
+
+
+def _matched(where):
+    return db.session.scalar(db.select(db.func.count(Asset.id)).where(where))
+
+
+def batch_status(data):
+    """Set the status of every selected asset with one UPDATE."""
+    status = data.get('status')
+    if status not in STATUS_CHOICES:
+        raise BatchError(f"status must be one of {', '.join(STATUS_CHOICES)}")
+    where = selection(data)
+    matched = _matched(where)
+    changing = db.and_(where, db.or_(Asset.status != status, Asset.status.is_(None)))
+
+    deltas = _counter_deltas(changing, {'status': status})
+    result = db.session.execute(
+        db.update(Asset).where(changing)
+        .values(status=status, last_updated=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    _finish(deltas, 'batch-status')
+    return {'matched': matched, 'changed': result.rowcount}
+
+
+def batch_transfer(data, user_id):
+    """Move every selected asset to a location.
+
+    The AssetTransfer rows are written with one INSERT ... SELECT from the
+    assets' current locations, then one UPDATE moves them; assets already
+    at the destination are left alone.
+    """
+    to_location = data.get('to_location')
+    if to_location not in LOCATION_CHOICES:
+        raise BatchError(f"to_location must be one of {', '.join(LOCATION_CHOICES)}")
+    where = selection(data)
+    matched = _matched(where)
+    moving = db.and_(where, db.or_(Asset.location != to_location, Asset.location.is_(None)))
+    now = datetime.utcnow()
+
+    deltas = _counter_deltas(moving, {'location': to_location})
+    db.session.execute(
+        db.insert(AssetTransfer).from_select(
+            ['asset_id', 'from_location', 'to_location', 'transferred_by', 'transfer_date'],
+            db.select(
+                Asset.id,
+                db.func.coalesce(Asset.location, ''),
+                db.literal(to_location),
+                db.literal(user_id),
+                db.literal(now, db.DateTime)
+            ).where(moving)
+        )
+    )
+    result = db.session.execute(
+        db.update(Asset).where(moving)
+        .values(location=to_location, last_updated=now)
+        .execution_options(synchronize_session=False)
+    )
+    _finish(deltas, 'batch-transfer')
+    return {'matched': matched, 'changed': result.rowcount}
+
+
+def batch_delete(data):
+    """Delete the selected assets and, as the ORM cascade would, their components.
+
+    Checkouts and maintenance records are kept with asset_id cleared, the
+    same as deleting one asset through the session; transfer records,
+    which cannot exist without their asset, are deleted. Components are
+    followed at most MAX_TREE_DEPTH levels down, which also ends a
+    parent_id cycle.
+    """
+    where = selection(data)
+    selected = db.select(Asset.id, db.literal(0).label('depth')).where(where)\
+        .cte('selected', recursive=True)
+    selected = selected.union_all(
+        db.select(Asset.id, (selected.c.depth + 1).label('depth'))
+        .join(selected, Asset.parent_id == selected.c.id)
+        .where(selected.c.depth < MAX_TREE_DEPTH)
+    )
+    ids = db.select(selected.c.id).scalar_subquery()
+    # An asset is reached more than once if it sits under another selected one
+    matched = db.session.scalar(db.select(db.func.count(db.distinct(selected.c.id))))
+    if not matched:
+        return {'matched': 0, 'changed': 0}
+
+    deleting = Asset.id.in_(ids)
+    deltas = _counter_deltas(deleting)
+    for model in (Checkout, Maintenance):
+        db.session.execute(
+            db.update(model).where(model.asset_id.in_(ids)).values(asset_id=None)
+            .execution_options(synchronize_session=False)
+        )
+    db.session.execute(
+        db.delete(AssetTransfer).where(AssetTransfer.asset_id.in_(ids))
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(
+        db.delete(Asset).where(deleting).execution_options(synchronize_session=False)
+    )
+    _finish(deltas, 'batch-delete')
+    # Every selected row is deleted; rowcount is unreliable for WITH statements
+    return {'matched': matched, 'changed': matched}
@@ -0,0 +1,70 @@
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models import Asset, AssetTransfer, Checkout, Maintenance, User
+from app.pagination import keyset_paginate
+from app.assets.tree import subtree, rollup, ancestors
+
+# Rows shown per history panel, and per "load more" request
+HISTORY_PAGE_SIZE = 5
+
+
+def _checkouts(asset_id):
+    return Checkout.query.filter(Checkout.asset_id == asset_id)\
+        .options(joinedload(Checkout.user).load_only(User.username))
+
+
+def _maintenance(asset_id):
+    return Maintenance.query.filter(Maintenance.asset_id == asset_id)
+
+
+def _transfers(asset_id):
+    return AssetTransfer.query.filter(AssetTransfer.asset_id == asset_id)\
+        .options(joinedload(AssetTransfer.user).load_only(User.username))
+
+
+# Panel name -> (query for one asset's rows, keyset sort keys, newest first).
+# The usernames are joined into the same query, so a panel is one statement.
+HISTORY_PANELS = {
+    'checkouts': (_checkouts, [Checkout.checkout_date, Checkout.id]),
+    'maintenance': (_maintenance, [Maintenance.start_date, Maintenance.id]),
+    'transfers': (_transfers, [AssetTransfer.transfer_date, AssetTransfer.id]),
+}
+
+
+def history_page(panel, asset_id, cursor=None, per_page=HISTORY_PAGE_SIZE):
+    """One keyset page of an asset's history panel, newest first."""
+    query_for, keys = HISTORY_PANELS[panel]
+    return keyset_paginate(query_for(asset_id), keys, cursor, per_page, descending=True)
+
+
+class AssetDetails:
+    """Everything the asset details page shows, in a fixed number of queries.
+
+    One query for the asset, three for its component tree (ancestors,
+    subtree, roll-up) and one per history panel, however long the asset's
+    history or deep its tree. Older history is fetched a page at a time
+    through the panels' cursors.
+    """
+
+    def __init__(self, asset):
+        self.asset = asset
+        self.ancestors = ancestors(asset.id)
+        self.components = subtree(asset.id)
+        self.component_rollup = rollup(asset.id)
+        self.history = {panel: history_page(panel, asset.id) for panel in HISTORY_PANELS}
+
+    @classmethod
+    def load(cls, asset_id):
+        """Details for an asset, or None if it does not exist."""
+        asset = db.session.get(Asset, asset_id)
+        return cls(asset) if asset else None
+
+    def as_context(self):
+        return {
+            'asset': self.asset,
+            'ancestors': self.ancestors,
+            'components': self.components,
+            'component_rollup': self.component_rollup,
+            'history': self.history,
+        }
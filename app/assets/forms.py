@@ -1,5 +1,6 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, SelectField, TextAreaField, SubmitField
+from flask_wtf.file import FileField, FileRequired, FileAllowed
+from wtforms import StringField, SelectField, TextAreaField, SubmitField, BooleanField, HiddenField
 from wtforms.validators import DataRequired, Optional
 
 class AssetForm(FlaskForm):
@@ -77,7 +78,9 @@ class AssetFilterForm(FlaskForm):
 
 
 class TransferAssetForm(FlaskForm):
-    asset_id = SelectField('Asset', coerce=int, validators=[DataRequired()])
+    # Picked with the typeahead on the page; the route checks the id exists
+    asset_id = HiddenField('Asset', validators=[DataRequired(message='Choose an asset.')])
+    asset_search = StringField('Asset', validators=[Optional()])
     to_location = SelectField('Transfer To', choices=[
         ('Mamal Boys Lab', 'Mamal Boys Lab'),
         ('Mamal Girls Lab', 'Mamal Girls Lab'),
@@ -86,3 +89,12 @@ class TransferAssetForm(FlaskForm):
         ('Main Office', 'Main Office')
     ], validators=[DataRequired()])
     submit = SubmitField('Transfer')
+
+
+class AssetImportForm(FlaskForm):
+    file = FileField('CSV or Excel file', validators=[
+        FileRequired(),
+        FileAllowed(['csv', 'xlsx'], 'Upload a .csv or .xlsx file.')
+    ])
+    dry_run = BooleanField('Validate only (do not save)')
+    submit = SubmitField('Import')
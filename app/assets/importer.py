@@ -0,0 +1,225 @@
+import csv
+import io
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models import Asset, apply_counter_deltas, bump_data_version, lookup_key, COUNTED_ATTRIBUTES
+from app.events import queue_resync
+from app.assets.forms import AssetForm
+
+# Rows validated, checked for existing serials and inserted per transaction
+IMPORT_BATCH_SIZE = 1000
+
+# Only the first errors are kept for the report; the rest are just counted
+MAX_REPORTED_ERRORS = 500
+
+IMPORT_COLUMNS = ('name', 'serial_number', 'asset_type', 'location', 'status', 'condition', 'notes')
+REQUIRED_COLUMNS = ('name', 'serial_number', 'asset_type', 'location', 'status')
+
+# Header spellings accepted besides the column names themselves
+HEADER_ALIASES = {
+    'serial': 'serial_number',
+    'serial_no': 'serial_number',
+    'type': 'asset_type',
+    'asset_name': 'name',
+}
+
+
+def _choices(field):
+    """{lowercased value: value} for an AssetForm select field, blanks excluded."""
+    return {value.lower(): value for value, _ in field.kwargs['choices'] if value}
+
+
+# The same choices add_asset accepts, matched case-insensitively
+CHOICES = {
+    'asset_type': _choices(AssetForm.asset_type),
+    'location': _choices(AssetForm.location),
+    'status': _choices(AssetForm.status),
+}
+
+
+class ImportResult:
+    """Outcome of an import: counts plus (line, message) errors for rejected rows."""
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.rows_read = 0
+        self.inserted = 0
+        self.error_count = 0
+        self.errors = []
+        self.batches = 0
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def as_dict(self):
+        return {
+            'dry_run': self.dry_run,
+            'rows_read': self.rows_read,
+            'inserted': self.inserted,
+            'error_count': self.error_count,
+            'errors': [{'line': line, 'message': message} for line, message in self.errors],
+            'batches': self.batches,
+        }
+
+
+def _header(value):
+    name = str(value or '').strip().lower().replace(' ', '_')
+    return HEADER_ALIASES.get(name, name)
+
+
+def _cell(value):
+    """Spreadsheet cell -> stripped string; whole-number floats lose their '.0'."""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def check_headers(headers):
+    """Raise ValueError unless the header row names every required column."""
+    missing = [column for column in REQUIRED_COLUMNS if column not in headers]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+
+
+def read_rows(stream, filename):
+    """Yield (line number, {column: value}) from a CSV or XLSX file, one row at a time.
+
+    The header row is checked before any data row is read, so a file with
+    missing columns fails even if it has no data.
+    """
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension == 'csv':
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        reader = csv.reader(text)
+        headers = [_header(value) for value in next(reader, [])]
+        check_headers(headers)
+        for values in reader:
+            if any(value.strip() for value in values):
+                yield reader.line_num, dict(zip(headers, (value.strip() for value in values)))
+    elif extension == 'xlsx':
+        from openpyxl import load_workbook
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            headers = [_header(value) for value in next(rows, ())]
+            check_headers(headers)
+            for line, values in enumerate(rows, start=2):
+                values = [_cell(value) for value in values]
+                if any(values):
+                    yield line, dict(zip(headers, values))
+        finally:
+            workbook.close()
+    else:
+        raise ValueError('Unsupported file type; upload a .csv or .xlsx file.')
+
+
+def validate_row(row):
+    """Apply the AssetForm rules to one row. Returns (values, error messages)."""
+    errors = []
+    values = {}
+    for column in IMPORT_COLUMNS:
+        value = row.get(column) or ''
+        if not value:
+            if column in REQUIRED_COLUMNS:
+                errors.append(f'{column} is required')
+            values[column] = None
+            continue
+        if column in CHOICES:
+            canonical = CHOICES[column].get(value.lower())
+            if canonical is None:
+                errors.append(f'{column} {value!r} is not a valid choice')
+            value = canonical
+        length = getattr(Asset.__table__.c[column].type, 'length', None)
+        if length and value and len(value) > length:
+            errors.append(f'{column} is longer than {length} characters')
+        values[column] = value
+    return values, errors
+
+
+def _insert_batch(batch, result, dry_run):
+    """Reject serials that already exist (one IN query) and insert the rest."""
+    serials = [values['serial_number'] for _, values in batch]
+    existing = set(db.session.scalars(
+        db.select(Asset.serial_number).where(Asset.serial_number.in_(serials))
+    ))
+    rows = []
+    for line, values in batch:
+        if values['serial_number'] in existing:
+            result.add_error(line, f"serial_number {values['serial_number']!r} already exists")
+        else:
+            rows.append(values)
+    if not rows:
+        return
+    if dry_run:
+        result.inserted += len(rows)
+        return
+
+    # Bulk inserts skip mapper events, so counters, the data version and
+    # live dashboards are updated here for the whole batch
+    now = datetime.utcnow()
+    deltas = {}
+    for values in rows:
+        values['created_at'] = values['last_updated'] = now
+        values['name_key'] = lookup_key(values['name'])
+        values['serial_key'] = lookup_key(values['serial_number'])
+        for dimension, attr, to_value in COUNTED_ATTRIBUTES[Asset]:
+            key = (dimension, to_value(values[attr]) or '')
+            deltas[key] = deltas.get(key, 0) + 1
+    try:
+        db.session.execute(db.insert(Asset), rows)
+        connection = db.session.connection()
+        apply_counter_deltas(connection, deltas)
+        bump_data_version(connection)
+        queue_resync(db.session, 'import')
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        first_line = batch[0][0]
+        for line, _ in batch:
+            result.add_error(line, f'batch starting at line {first_line} was not saved: {e.orig}')
+        return
+    result.inserted += len(rows)
+    result.batches += 1
+
+
+def import_assets(stream, filename, dry_run=False, batch_size=IMPORT_BATCH_SIZE):
+    """Stream assets from a CSV / XLSX file into the database in batches.
+
+    Each batch is one transaction: one set-based lookup for serials that
+    already exist, then one executemany INSERT. Invalid rows are reported
+    with their line number and skipped; valid rows are still imported.
+    With dry_run nothing is written. Raises ValueError for an unsupported
+    file or missing required columns.
+    """
+    result = ImportResult(dry_run)
+    rows = read_rows(stream, filename)
+    seen = {}
+    batch = []
+
+    for line, row in rows:
+        result.rows_read += 1
+
+        values, errors = validate_row(row)
+        serial = values['serial_number']
+        if serial and serial in seen:
+            errors.append(f'serial_number {serial!r} repeats line {seen[serial]}')
+        if errors:
+            result.add_error(line, '; '.join(errors))
+            continue
+        seen[serial] = line
+
+        batch.append((line, values))
+        if len(batch) >= batch_size:
+            _insert_batch(batch, result, dry_run)
+            batch = []
+
+    if batch:
+        _insert_batch(batch, result, dry_run)
+    return result
@@ -0,0 +1,174 @@
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from tempfile import SpooledTemporaryFile
+from threading import Lock
+
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.units import inch
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas
+
+from app import db
+from app.models import Asset
+from app.qr import qr_cache, qr_key, qr_payload, render_qr
+from app.reports.exports import SPOOL_MAX_SIZE
+
+# Largest grid a sheet may use, and the most labels one request may ask for
+MAX_COLUMNS = 6
+MAX_ROWS = 15
+MAX_LABELS = 10000
+
+PAGE_MARGIN = 0.4 * inch
+LABEL_PADDING = 0.08 * inch
+
+# Pages whose QR codes are rendered together before being drawn
+PAGES_PER_ROUND = 8
+
+# Pixels per QR module in label images
+LABEL_BOX_SIZE = 1
+
+
+def _render_modules(payload):
+    """Process-pool task: a QR code as a PNG of one pixel per module.
+
+    The PDF scales it up without interpolation, so the label stays sharp
+    while reportlab has only a few hundred pixels per image to embed.
+    """
+    return render_qr(payload, 'png', box_size=LABEL_BOX_SIZE)
+
+
+_executor = None
+_executor_lock = Lock()
+
+
+def label_executor(workers):
+    """Shared process pool for QR rendering, started on first use.
+
+    Workers are spawned rather than forked, since the web worker forking
+    them is multi-threaded.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=workers,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        return _executor
+
+
+class LabelError(ValueError):
+    """Invalid label sheet request; the message is shown to the user."""
+
+
+def parse_label_request(args, default_columns=3, default_rows=8):
+    """Filters and grid from ?location=&asset_type=&id_from=&id_to=&columns=&rows=."""
+    clauses = []
+    for key in ('location', 'asset_type'):
+        value = (args.get(key) or '').strip()
+        if value:
+            clauses.append(getattr(Asset, key) == value)
+    for key, compare in (('id_from', lambda v: Asset.id >= v), ('id_to', lambda v: Asset.id <= v)):
+        value = args.get(key)
+        if value not in (None, ''):
+            try:
+                clauses.append(compare(int(value)))
+            except (TypeError, ValueError):
+                raise LabelError(f'{key} must be a whole number')
+
+    try:
+        columns = int(args.get('columns') or default_columns)
+        rows = int(args.get('rows') or default_rows)
+    except (TypeError, ValueError):
+        raise LabelError('columns and rows must be whole numbers')
+    if not (1 <= columns <= MAX_COLUMNS and 1 <= rows <= MAX_ROWS):
+        raise LabelError(f'Grid must be 1-{MAX_COLUMNS} columns by 1-{MAX_ROWS} rows')
+    return clauses, columns, rows
+
+
+def _draw_label(pdf, x, y, width, height, asset, image):
+    size = min(height, width / 2) - 2 * LABEL_PADDING
+    pdf.drawImage(ImageReader(io.BytesIO(image)), x + LABEL_PADDING, y + (height - size) / 2, size, size)
+
+    text_x = x + size + 2 * LABEL_PADDING
+    text_width = width - size - 3 * LABEL_PADDING
+    lines = [
+        ('Helvetica-Bold', 9, asset.name),
+        ('Helvetica', 8, asset.serial_number),
+        ('Helvetica', 7, asset.location or ''),
+    ]
+    text_y = y + height / 2 + 10
+    for font, font_size, text in lines:
+        # Trim to the label width rather than overflow into the next label
+        while text and pdf.stringWidth(text, font, font_size) > text_width:
+            text = text[:-1]
+        pdf.setFont(font, font_size)
+        pdf.drawString(text_x, text_y, text)
+        text_y -= font_size + 3
+
+
+def write_label_sheet(clauses, columns=3, rows=8, details_url=None, workers=None):
+    """Render a QR label sheet PDF into a spooled file.
+
+    Assets are read from a server-side cursor a few pages at a time. QR
+    codes not in the QR cache yet are rasterized across a process pool and
+    stored there, and each batch's pages are drawn as soon as its images
+    are back, so memory stays flat however many labels are asked for.
+    details_url(asset_id) builds the link encoded in each label. Returns
+    the file rewound to the start.
+    """
+    count = db.session.scalar(db.select(db.func.count(Asset.id)).where(*clauses))
+    if count > MAX_LABELS:
+        raise LabelError(f'{count} assets match; narrow the filter to at most {MAX_LABELS}')
+
+    workers = workers if workers is not None else (os.cpu_count() or 1)
+    executor = label_executor(workers) if workers > 0 else None
+
+    output = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    pdf = canvas.Canvas(output, pagesize=letter)
+    page_width, page_height = letter
+    label_width = (page_width - 2 * PAGE_MARGIN) / columns
+    label_height = (page_height - 2 * PAGE_MARGIN) / rows
+    per_page = columns * rows
+
+    stmt = db.select(Asset.id, Asset.name, Asset.serial_number, Asset.location)\
+        .where(*clauses).order_by(Asset.id)\
+        .execution_options(yield_per=per_page * PAGES_PER_ROUND)
+
+    drawn = 0
+    for batch in db.session.execute(stmt).partitions():
+        payloads = [
+            qr_payload(asset.id, asset.serial_number,
+                       details_url(asset.id) if details_url else None)
+            for asset in batch
+        ]
+        keys = [qr_key(payload, 'png', LABEL_BOX_SIZE) for payload in payloads]
+        images = [qr_cache.load(key, 'png') for key in keys]
+        missing = [i for i, image in enumerate(images) if image is None]
+
+        jobs = [payloads[i] for i in missing]
+        if executor and len(jobs) > 1:
+            chunksize = max(1, len(jobs) // (workers * 4))
+            rendered = executor.map(_render_modules, jobs, chunksize=chunksize)
+        else:
+            rendered = map(_render_modules, jobs)
+        for i, image in zip(missing, rendered):
+            qr_cache.store(keys[i], 'png', image)
+            images[i] = image
+
+        for asset, image in zip(batch, images):
+            slot = drawn % per_page
+            if slot == 0 and drawn:
+                pdf.showPage()
+            column, row = slot % columns, slot // columns
+            x = PAGE_MARGIN + column * label_width
+            y = page_height - PAGE_MARGIN - (row + 1) * label_height
+            _draw_label(pdf, x, y, label_width, label_height, asset, image)
+            drawn += 1
+
+    if not drawn:
+        pdf.setFont('Helvetica', 12)
+        pdf.drawString(PAGE_MARGIN, page_height - PAGE_MARGIN - 12, 'No assets match this filter.')
+    pdf.save()
+    output.seek(0)
+    return output
@@ -1,12 +1,24 @@
-from flask import render_template, request, redirect, url_for, flash, current_app
+from flask import (
+    render_template, request, redirect, url_for, flash, current_app, jsonify, abort, send_file
+)
+import os
+import re
 from flask_login import login_required, current_user
-from sqlalchemy import or_
 from datetime import datetime
 
 from app import db
-from app.models import Asset, AssetTransfer
+from app.models import Asset, AssetTransfer, lookup_key
 from app.assets import bp
-from app.assets.forms import AssetForm, AssetFilterForm, TransferAssetForm
+from app.search import search_assets
+from app.pagination import keyset_paginate
+from app.dashboard import DashboardStats
+from app.assets.forms import AssetForm, AssetFilterForm, TransferAssetForm, AssetImportForm
+from app.assets.importer import import_assets
+from app.assets.tree import subtree, rollup, ancestors as asset_ancestors
+from app.assets.details import AssetDetails, HISTORY_PANELS, history_page
+from app.qr import qr_cache, qr_payload, QR_FORMATS
+from app.assets.labels import LabelError, parse_label_request, write_label_sheet
+from app.assets.batch import BatchError, batch_status, batch_transfer, batch_delete
 
 def flash_message(message, category='info'):
     flash(message, category)
@@ -14,7 +26,7 @@ def flash_message(message, category='info'):
 @bp.route('/')
 @login_required
 def view_assets():
-    page = request.args.get('page', 1, type=int)
+    cursor = request.args.get('cursor', '', type=str)
     location = request.args.get('location', '', type=str)
     status = request.args.get('status', '', type=str)
     search = request.args.get('search', '', type=str)
@@ -25,20 +37,20 @@ def view_assets():
         query = query.filter(Asset.location == location)
     if status:
         query = query.filter(Asset.status == status)
-    if search:
-        keyword = f"%{search}%"
-        query = query.filter(
-            or_(
-                Asset.name.ilike(keyword),
-                Asset.serial_number.ilike(keyword),
-                Asset.asset_type.ilike(keyword),
-                Asset.location.ilike(keyword),
-            )
-        )
+    if search.strip():
+        # Indexed, relevance-ranked search (FTS5 / pg_trgm)
+        query, keys, descending = search_assets(query, search)
+        total = None
+    else:
+        keys, descending = [Asset.name, Asset.id], False
+        # The unfiltered total comes from the cached dashboard counts, not COUNT(*)
+        total = None if location or status else DashboardStats.cached().total_assets
 
-    assets = query.order_by(Asset.name.asc()).paginate(
-        page=page,
-        per_page=current_app.config.get('ITEMS_PER_PAGE', 10)
+    assets = keyset_paginate(
+        query, keys, cursor,
+        per_page=current_app.config.get('ITEMS_PER_PAGE', 10),
+        descending=descending,
+        total=total
     )
 
     filter_form = AssetFilterForm(location=location, status=status, search=search)
@@ -47,8 +59,35 @@ def view_assets():
 @bp.route('/<int:asset_id>')
 @login_required
 def asset_details(asset_id):
+    details = AssetDetails.load(asset_id)
+    if details is None:
+        abort(404)
+    return render_template('assets/asset_details.html', **details.as_context())
+
+@bp.route('/<int:asset_id>/history/<panel>')
+@login_required
+def asset_history(asset_id, panel):
+    """Next page of a details-page history panel, as rendered rows plus its cursor."""
+    if panel not in HISTORY_PANELS:
+        abort(404)
+    page = history_page(panel, asset_id, request.args.get('cursor', '', type=str))
+    return jsonify({
+        'html': render_template('assets/_history_rows.html', panel=panel, page=page),
+        'next_cursor': page.next_cursor,
+    })
+
+@bp.route('/<int:asset_id>/tree')
+@login_required
+def asset_tree(asset_id):
+    """JSON component tree: ancestors, the whole subtree and its roll-up by type."""
     asset = Asset.query.get_or_404(asset_id)
-    return render_template('assets/asset_details.html', asset=asset)
+    return jsonify({
+        'id': asset.id,
+        'ancestors': [node._asdict() for node in asset_ancestors(asset.id)],
+        'components': [node._asdict() for node in subtree(asset.id)],
+        'rollup': [{'asset_type': row.asset_type, 'total': row.total, 'available': row.available}
+                   for row in rollup(asset.id)],
+    })
 
 @bp.route('/add', methods=['GET', 'POST'])
 @login_required
@@ -71,6 +110,25 @@ def add_asset():
 
     return render_template('assets/add_asset.html', form=form)
 
+@bp.route('/import', methods=['GET', 'POST'])
+@login_required
+def import_assets_upload():
+    form = AssetImportForm()
+    result = None
+    if form.validate_on_submit():
+        upload = form.file.data
+        try:
+            result = import_assets(upload.stream, upload.filename, dry_run=form.dry_run.data)
+        except ValueError as e:
+            flash_message(str(e), 'danger')
+        else:
+            verb = 'validated' if result.dry_run else 'imported'
+            category = 'warning' if result.error_count else 'success'
+            flash_message(f'{result.inserted} of {result.rows_read} assets {verb}; '
+                          f'{result.error_count} rows rejected.', category)
+
+    return render_template('assets/import_assets.html', form=form, result=result)
+
 @bp.route('/edit/<int:asset_id>', methods=['GET', 'POST'])
 @login_required
 def edit_asset(asset_id):
@@ -103,10 +161,13 @@ def delete_asset(asset_id):
 @login_required
 def transfer_asset():
     form = TransferAssetForm()
-    form.asset_id.choices = [(a.id, f"{a.name} ({a.serial_number})") for a in Asset.query.order_by(Asset.name).all()]
 
     if form.validate_on_submit():
-        asset = Asset.query.get_or_404(form.asset_id.data)
+        asset = db.session.get(Asset, form.asset_id.data) if form.asset_id.data.isdigit() else None
+        if asset is None:
+            form.asset_id.errors.append('Choose an asset from the list.')
+            return render_template('assets/transfer_asset.html', form=form)
+
         from_location = asset.location
         to_location = form.to_location.data
 
@@ -134,9 +195,156 @@ def transfer_asset():
 @bp.route('/transfer-history')
 @login_required
 def transfer_history():
-    page = request.args.get('page', 1, type=int)
-    transfers = AssetTransfer.query.order_by(AssetTransfer.transfer_date.desc()).paginate(
-        page=page,
-        per_page=current_app.config.get('ITEMS_PER_PAGE', 10)
+    cursor = request.args.get('cursor', '', type=str)
+    transfers = keyset_paginate(
+        AssetTransfer.query,
+        [AssetTransfer.transfer_date, AssetTransfer.id],
+        cursor,
+        per_page=current_app.config.get('ITEMS_PER_PAGE', 10),
+        descending=True
     )
     return render_template('assets/transfer_history.html', transfers=transfers)
+
+
+# -------------------------------
+# Batch Operations API
+# -------------------------------
+def _run_batch(operation, *args):
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    try:
+        return jsonify(operation(data, *args))
+    except BatchError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
+@bp.route('/batch/status', methods=['POST'])
+@login_required
+def batch_status_change():
+    """{"ids": [..]} or {"filter": {..}} plus {"status": ".."}."""
+    return _run_batch(batch_status)
+
+@bp.route('/batch/transfer', methods=['POST'])
+@login_required
+def batch_transfer_assets():
+    """{"ids": [..]} or {"filter": {..}} plus {"to_location": ".."}."""
+    return _run_batch(batch_transfer, current_user.id)
+
+@bp.route('/batch/delete', methods=['POST'])
+@login_required
+def batch_delete_assets():
+    if current_user.role != 'admin':
+        return jsonify({'error': 'You do not have permission to delete assets.'}), 403
+    return _run_batch(batch_delete)
+
+
+# -------------------------------
+# Asset Typeahead Lookup
+# -------------------------------
+LOOKUP_MAX_RESULTS = 25
+
+def _prefix_range(column, prefix):
+    """column starts with prefix, as a range its index can scan.
+
+    Lookup keys compare by code point, so everything starting with prefix
+    sorts between it and prefix + U+10FFFF.
+    """
+    return db.and_(column >= prefix, column < prefix + '\U0010ffff')
+
+@bp.route('/lookup')
+@login_required
+def lookup_assets():
+    """Top matches whose name or serial number starts with ?q=, for typeahead pickers."""
+    prefix = lookup_key(request.args.get('q', '', type=str).strip())
+    limit = max(1, min(request.args.get('limit', 10, type=int), LOOKUP_MAX_RESULTS))
+    if not prefix:
+        return jsonify([])
+
+    columns = (Asset.id, Asset.name, Asset.serial_number, Asset.location)
+    by_name = db.session.execute(
+        db.select(*columns).where(_prefix_range(Asset.name_key, prefix))
+        .order_by(Asset.name_key).limit(limit)
+    ).all()
+    by_serial = db.session.execute(
+        db.select(*columns).where(_prefix_range(Asset.serial_key, prefix))
+        .order_by(Asset.serial_key).limit(limit)
+    ).all()
+
+    seen = set()
+    results = []
+    for row in by_name + by_serial:
+        if row.id not in seen and len(results) < limit:
+            seen.add(row.id)
+            results.append({
+                'id': row.id,
+                'name': row.name,
+                'serial_number': row.serial_number,
+                'location': row.location,
+                'label': f"{row.name} ({row.serial_number})",
+            })
+    return jsonify(results)
+
+
+# -------------------------------
+# QR Code Images
+# -------------------------------
+QR_MAX_AGE = 365 * 24 * 60 * 60
+
+def _send_qr(key, format, max_age=None):
+    path = qr_cache.path(key, format)
+    if not os.path.exists(path):
+        abort(404)
+    # conditional=True answers a matching If-None-Match with 304;
+    # without max_age the response is sent as no-cache (always revalidate)
+    response = send_file(path, mimetype=QR_FORMATS[format], etag=key,
+                         conditional=True, max_age=max_age)
+    # Images sit behind login, so browsers may keep them but shared caches may not
+    response.cache_control.public = False
+    response.cache_control.private = True
+    return response
+
+@bp.route('/<int:asset_id>/qr.<format>')
+@login_required
+def asset_qr(asset_id, format):
+    """An asset's current QR code; revalidated by ETag, rendered only when its payload changes."""
+    if format not in QR_FORMATS:
+        abort(404)
+    asset = db.session.execute(
+        db.select(Asset.id, Asset.serial_number).where(Asset.id == asset_id)
+    ).first()
+    if asset is None:
+        abort(404)
+    return _send_qr(qr_cache.ensure(qr_payload(asset.id, asset.serial_number), format), format)
+
+@bp.route('/qr/<key>.<format>')
+@login_required
+def qr_image(key, format):
+    """A cached QR image by content hash; the URL changes when the image would."""
+    if format not in QR_FORMATS or not re.fullmatch(r'[0-9a-f]{32}', key):
+        abort(404)
+    response = _send_qr(key, format, max_age=QR_MAX_AGE)
+    response.cache_control.immutable = True
+    return response
+
+
+# -------------------------------
+# QR Label Sheets
+# -------------------------------
+@bp.route('/labels.pdf')
+@login_required
+def label_sheet():
+    """PDF of QR labels for ?location=&asset_type=&id_from=&id_to=, on a ?columns= x ?rows= grid."""
+    try:
+        clauses, columns, rows = parse_label_request(
+            request.args,
+            current_app.config.get('LABEL_COLUMNS', 3),
+            current_app.config.get('LABEL_ROWS', 8)
+        )
+        output = write_label_sheet(clauses, columns, rows,
+                                   workers=current_app.config.get('LABEL_WORKERS'))
+    except LabelError as e:
+        flash_message(str(e), 'danger')
+        return redirect(url_for('assets.view_assets'))
+    return send_file(output, mimetype='application/pdf', as_attachment=True,
+                     download_name='asset_labels.pdf')
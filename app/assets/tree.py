@@ -0,0 +1,103 @@
+from collections import namedtuple
+
+from app import db
+from app.models import Asset
+
+# Deepest level walked; also stops a parent_id cycle from recursing forever
+MAX_TREE_DEPTH = 32
+
+TreeNode = namedtuple('TreeNode', 'id name serial_number asset_type status location parent_id depth path')
+
+
+def _node_columns(table):
+    return (table.c.id, table.c.name, table.c.serial_number, table.c.asset_type,
+            table.c.status, table.c.location, table.c.parent_id)
+
+
+def _path(column):
+    # TEXT on both sides of the recursion; Postgres rejects varchar vs text
+    return db.cast(column, db.Text)
+
+
+def subtree_cte(asset_id):
+    """Recursive CTE of an asset and everything below it, with depth and id path.
+
+    depth is 0 for the asset itself; path is its ids from the top, '/'-joined.
+    """
+    asset = Asset.__table__
+    tree = db.select(
+        *_node_columns(asset),
+        db.literal(0).label('depth'),
+        _path(asset.c.id).label('path')
+    ).where(asset.c.id == asset_id).cte('subtree', recursive=True)
+
+    child = asset.alias('child')
+    return tree.union_all(
+        db.select(
+            *_node_columns(child),
+            (tree.c.depth + 1).label('depth'),
+            (tree.c.path + '/' + _path(child.c.id)).label('path')
+        ).join(tree, child.c.parent_id == tree.c.id)
+         .where(tree.c.depth < MAX_TREE_DEPTH)
+    )
+
+
+def subtree(asset_id):
+    """Every component under an asset, in one query, depth-first by name.
+
+    The asset itself is not included; each node's depth counts from 1.
+    """
+    tree = subtree_cte(asset_id)
+    rows = db.session.execute(db.select(tree).where(tree.c.depth > 0)).all()
+
+    children = {}
+    for row in rows:
+        children.setdefault(row.parent_id, []).append(TreeNode(*row))
+    for siblings in children.values():
+        siblings.sort(key=lambda node: (node.name.lower(), node.id))
+
+    ordered = []
+    stack = list(reversed(children.get(asset_id, [])))
+    while stack:
+        node = stack.pop()
+        ordered.append(node)
+        stack.extend(reversed(children.get(node.id, [])))
+    return ordered
+
+
+def ancestors(asset_id):
+    """The chain of parents above an asset, top-most first, in one query."""
+    asset = Asset.__table__
+    chain = db.select(
+        *_node_columns(asset),
+        db.literal(0).label('depth'),
+        _path(asset.c.id).label('path')
+    ).where(asset.c.id == asset_id).cte('ancestors', recursive=True)
+
+    parent = asset.alias('parent')
+    chain = chain.union_all(
+        db.select(
+            *_node_columns(parent),
+            (chain.c.depth + 1).label('depth'),
+            (_path(parent.c.id) + '/' + chain.c.path).label('path')
+        ).join(chain, parent.c.id == chain.c.parent_id)
+         .where(chain.c.depth < MAX_TREE_DEPTH)
+    )
+    rows = db.session.execute(
+        db.select(chain).where(chain.c.depth > 0).order_by(chain.c.depth.desc())
+    ).all()
+    return [TreeNode(*row) for row in rows]
+
+
+def rollup(asset_id):
+    """(asset_type, total, available) for all components under an asset, grouped in SQL."""
+    tree = subtree_cte(asset_id)
+    return db.session.execute(
+        db.select(
+            tree.c.asset_type,
+            db.func.count().label('total'),
+            db.func.count(db.case((tree.c.status == 'Available', 1))).label('available')
+        ).where(tree.c.depth > 0)
+         .group_by(tree.c.asset_type)
+         .order_by(db.func.count().desc(), tree.c.asset_type)
+    ).all()
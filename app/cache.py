@@ -0,0 +1,80 @@
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
+
+from app import db
+from app.models import DataVersion
+
+
+def current_data_version():
+    """Current inventory data version; 0 before the first write."""
+    version = db.session.query(DataVersion.version).filter_by(id=1).scalar()
+    return version or 0
+
+
+class VersionedCache:
+    """Thread-safe in-process LRU cache whose entries are tied to a data version.
+
+    An entry is only returned while the version it was stored under is still
+    current, so writes invalidate it immediately; the TTL just bounds how long
+    an unused entry can linger.
+    """
+
+    def __init__(self, max_entries=64, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_version, expires, value = entry
+                if entry_version == version and expires > monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (version, monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_set(self, key, version, factory):
+        value = self.get(key, version)
+        if value is None:
+            value = factory()
+            self.set(key, version, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+dashboard_cache = VersionedCache()
+
+
+def init_cache(app):
+    dashboard_cache.max_entries = app.config.get('DASHBOARD_CACHE_SIZE', 64)
+    dashboard_cache.ttl = app.config.get('DASHBOARD_CACHE_TTL', 300)
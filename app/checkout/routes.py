@@ -4,6 +4,7 @@ from datetime import datetime
 from app import db
 from app.models import Asset, Checkout, User
 from app.checkout import bp
+from app.pagination import keyset_paginate
 from app.checkout.forms import CheckoutForm, CheckinForm
 
 # Route to view active checkouts
@@ -17,10 +18,14 @@ def active_checkouts():
 @bp.route('/history')
 @login_required
 def checkout_history():
-    page = request.args.get('page', 1, type=int)
-    checkouts = Checkout.query.filter(Checkout.actual_return != None)\
-        .order_by(Checkout.checkout_date.desc())\
-        .paginate(page=page, per_page=current_app.config.get('ITEMS_PER_PAGE', 10))
+    cursor = request.args.get('cursor', '', type=str)
+    checkouts = keyset_paginate(
+        Checkout.query.filter(Checkout.actual_return != None),
+        [Checkout.checkout_date, Checkout.id],
+        cursor,
+        per_page=current_app.config.get('ITEMS_PER_PAGE', 10),
+        descending=True
+    )
     return render_template('checkout/checkout_history.html', checkouts=checkouts)
 
 # Route to checkout an asset
@@ -0,0 +1,116 @@
+import click
+from flask.cli import AppGroup
+
+counters_cli = AppGroup('counters', help='Maintain the inventory_counters table.')
+
+
+@counters_cli.command('rebuild')
+def rebuild_counters_command():
+    """Recount inventory_counters from scratch."""
+    from app.counters import rebuild_counters
+    counts = rebuild_counters()
+    click.echo(f"Rebuilt {len(counts)} inventory counters.")
+
+
+@counters_cli.command('check')
+def check_counters_command():
+    """Report counters that have drifted from the source tables."""
+    from app.counters import counter_drift, counters_ready, read_counters
+    if not counters_ready(read_counters()):
+        click.echo("Inventory counters have not been built; run `flask counters rebuild`.")
+        raise SystemExit(1)
+    drift = counter_drift()
+    if not drift:
+        click.echo("Inventory counters are in sync.")
+        return
+    for (dimension, value), (stored, actual) in sorted(drift.items()):
+        click.echo(f"{dimension}={value!r}: stored {stored}, actual {actual}")
+    raise SystemExit(1)
+
+
+snapshots_cli = AppGroup('snapshots', help='Maintain the daily rollup tables.')
+
+
+@snapshots_cli.command('take')
+@click.option('--date', 'snapshot_date', type=click.DateTime(formats=['%Y-%m-%d']),
+              help='Date to record the snapshot under (default: today).')
+def take_snapshot_command(snapshot_date):
+    """Write (or rewrite) the daily rollup rows from current inventory."""
+    from app.rollups import take_daily_snapshot
+    taken = take_daily_snapshot(snapshot_date.date() if snapshot_date else None)
+    click.echo(f"Daily snapshot written for {taken}.")
+
+
+search_cli = AppGroup('search', help='Maintain the asset search index.')
+
+
+@search_cli.command('rebuild')
+def rebuild_search_command():
+    """Create the asset search index if missing and rebuild it."""
+    from app.search import rebuild_search_index
+    backend = rebuild_search_index()
+    click.echo(f"Rebuilt asset search index ({backend.name}).")
+
+
+assets_cli = AppGroup('assets', help='Asset maintenance commands.')
+
+
+@assets_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--dry-run', is_flag=True, help='Validate the file without saving anything.')
+def import_assets_command(path, dry_run):
+    """Bulk import assets from a CSV or XLSX file."""
+    from app.assets.importer import import_assets
+    with open(path, 'rb') as stream:
+        try:
+            result = import_assets(stream, path, dry_run=dry_run)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    for line, message in result.errors:
+        click.echo(f"line {line}: {message}", err=True)
+    if result.error_count > len(result.errors):
+        click.echo(f"... and {result.error_count - len(result.errors)} more errors", err=True)
+    verb = 'validated' if dry_run else 'imported'
+    click.echo(f"{result.inserted} of {result.rows_read} assets {verb} "
+               f"in {result.batches} batches; {result.error_count} rows rejected.")
+    if result.error_count:
+        raise SystemExit(1)
+
+
+@assets_cli.command('labels')
+@click.argument('output', type=click.Path(dir_okay=False, writable=True))
+@click.option('--location', help='Only assets at this location.')
+@click.option('--type', 'asset_type', help='Only assets of this type.')
+@click.option('--id-from', type=int, help='Lowest asset id to include.')
+@click.option('--id-to', type=int, help='Highest asset id to include.')
+@click.option('--columns', type=int, help='Labels across a page.')
+@click.option('--rows', type=int, help='Labels down a page.')
+@click.option('--base-url', default='http://localhost:5000',
+              help='Site address encoded in the labels\' links.')
+def labels_command(output, location, asset_type, id_from, id_to, columns, rows, base_url):
+    """Write a PDF sheet of QR labels for the matching assets."""
+    import shutil
+    from flask import current_app
+    from app.assets.labels import LabelError, parse_label_request, write_label_sheet
+    app = current_app._get_current_object()
+    args = {'location': location, 'asset_type': asset_type, 'id_from': id_from,
+            'id_to': id_to, 'columns': columns, 'rows': rows}
+    # Links in the labels are built as they would be for a request to base_url
+    with app.test_request_context(base_url=base_url):
+        try:
+            clauses, columns, rows = parse_label_request(
+                args, app.config.get('LABEL_COLUMNS', 3), app.config.get('LABEL_ROWS', 8))
+            sheet = write_label_sheet(clauses, columns, rows,
+                                      workers=app.config.get('LABEL_WORKERS'))
+        except LabelError as e:
+            raise click.ClickException(str(e))
+    with open(output, 'wb') as f:
+        shutil.copyfileobj(sheet, f)
+    click.echo(f"Wrote {output}.")
+
+
+def register_commands(app):
+    app.cli.add_command(counters_cli)
+    app.cli.add_command(snapshots_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(assets_cli)
@@ -0,0 +1,83 @@
+from app import db
+from app.models import InventoryCounter, Asset, Maintenance, Checkout, upsert
+
+# Written by rebuild_counters. Until it exists the flush hooks have only been
+# adding deltas to an empty table, so the counts are not totals.
+READY_MARKER = ('meta', 'initialized')
+
+
+def compute_counters():
+    """Recount every inventory counter from the source tables."""
+    counts = {}
+
+    for dimension, column in (('asset_type', Asset.asset_type),
+                              ('status', Asset.status),
+                              ('location', Asset.location)):
+        rows = db.session.query(column, db.func.count(Asset.id)).group_by(column).all()
+        for value, count in rows:
+            counts[(dimension, '' if value is None else value)] = count
+
+    rows = db.session.query(Maintenance.status, db.func.count(Maintenance.id))\
+        .group_by(Maintenance.status).all()
+    for value, count in rows:
+        counts[('maintenance_status', '' if value is None else value)] = count
+
+    is_open = Checkout.actual_return.is_(None)
+    rows = db.session.query(is_open, db.func.count(Checkout.id)).group_by(is_open).all()
+    for open_, count in rows:
+        counts[('checkout', 'open' if open_ else 'returned')] = count
+
+    return counts
+
+
+def read_counters():
+    """Current counter table as {(dimension, value): count}."""
+    return {
+        (row.dimension, row.value): row.count
+        for row in db.session.query(
+            InventoryCounter.dimension, InventoryCounter.value, InventoryCounter.count
+        )
+    }
+
+
+def counters_ready(counters):
+    """Whether counters (from read_counters) come from a completed rebuild."""
+    return READY_MARKER in counters
+
+
+def counter_drift():
+    """Counters whose stored value differs from a fresh recount.
+
+    Returns {(dimension, value): (stored, actual)}; empty when in sync.
+    """
+    stored = read_counters()
+    stored.pop(READY_MARKER, None)
+    actual = compute_counters()
+    drift = {}
+    for key in set(stored) | set(actual):
+        if stored.get(key, 0) != actual.get(key, 0):
+            drift[key] = (stored.get(key, 0), actual.get(key, 0))
+    return drift
+
+
+def rebuild_counters():
+    """Overwrite the counter table with a fresh recount in one transaction.
+
+    Counters are upserted rather than deleted and reinserted, so a write
+    that creates a counter row meanwhile cannot hit a key conflict.
+    """
+    counts = compute_counters()
+    rows = [
+        {'dimension': dimension, 'value': value, 'count': count}
+        for (dimension, value), count in counts.items()
+    ]
+    rows.append({'dimension': READY_MARKER[0], 'value': READY_MARKER[1], 'count': 1})
+    table = InventoryCounter.__table__
+    connection = db.session.connection()
+    upsert(connection, table, rows, ['dimension', 'value'],
+           lambda table, excluded: {'count': excluded.count})
+    keep = db.tuple_(table.c.dimension, table.c.value).in_(
+        [(row['dimension'], row['value']) for row in rows])
+    connection.execute(table.delete().where(db.not_(keep)))
+    db.session.commit()
+    return counts
@@ -0,0 +1,139 @@
+from collections import namedtuple
+
+from app import db
+from app.models import Asset, Stationery, Maintenance, Checkout
+from app.counters import read_counters, counters_ready
+from app.cache import dashboard_cache, current_data_version
+
+# Asset types that get their own dashboard bucket; everything else is 'other'.
+# Keys match what the dashboard and email templates read from asset_counts.
+DASHBOARD_ASSET_TYPES = [
+    ('monitor', 'Monitor'),
+    ('keyboard', 'Keyboard'),
+    ('cpu', 'CPU'),
+    ('mouse', 'Mouse'),
+    ('printer', 'Printer'),
+    ('server', 'Server'),
+]
+
+DASHBOARD_STATUSES = ['Available', 'In-use', 'Maintenance', 'Out of Service']
+
+# Plain snapshot of a low stock row, safe to keep in the cache across requests
+LowStockItem = namedtuple('LowStockItem', 'id item_type quantity unit threshold location')
+
+
+class DashboardStats:
+    """Dashboard summary shared by the dashboard page, CSV export and emails.
+
+    Counts come from the inventory_counters table once it has been rebuilt, so a
+    render costs two small queries however many assets there are. Otherwise
+    they are collected with one GROUP BY over (asset_type, status) and one
+    query for the pending/active counters.
+    """
+
+    def __init__(self, asset_counts, status_counts, low_stock, pending_maintenance, active_checkouts):
+        self.asset_counts = asset_counts
+        self.status_counts = status_counts
+        self.low_stock = low_stock
+        self.pending_maintenance = pending_maintenance
+        self.active_checkouts = active_checkouts
+
+    @classmethod
+    def cached(cls):
+        """Stats for the current data version, computed at most once per version."""
+        version = current_data_version()
+        return dashboard_cache.get_or_set('dashboard_stats', version, cls.collect)
+
+    @classmethod
+    def collect(cls):
+        counters = read_counters()
+        if counters_ready(counters):
+            stats = cls.from_counters(counters)
+        else:
+            stats = cls.from_tables()
+        rows = db.session.query(
+            Stationery.id,
+            Stationery.item_type,
+            Stationery.quantity,
+            Stationery.unit,
+            Stationery.threshold,
+            Stationery.location
+        ).filter(Stationery.quantity < Stationery.threshold).all()
+        stats.low_stock = [LowStockItem(*row) for row in rows]
+        return stats
+
+    @classmethod
+    def from_counters(cls, counters):
+        type_rows = [(v, n) for (d, v), n in counters.items() if d == 'asset_type']
+        status_rows = [(v, n) for (d, v), n in counters.items() if d == 'status']
+        asset_counts, status_counts = cls.bucket(type_rows, status_rows)
+        return cls(
+            asset_counts,
+            status_counts,
+            [],
+            counters.get(('maintenance_status', 'Pending'), 0),
+            counters.get(('checkout', 'open'), 0)
+        )
+
+    @classmethod
+    def from_tables(cls):
+        rows = db.session.query(
+            Asset.asset_type,
+            Asset.status,
+            db.func.count(Asset.id)
+        ).group_by(Asset.asset_type, Asset.status).all()
+        asset_counts, status_counts = cls.bucket(
+            [(asset_type, count) for asset_type, _, count in rows],
+            [(status, count) for _, status, count in rows]
+        )
+
+        pending_q = db.select(db.func.count(Maintenance.id))\
+            .where(Maintenance.status == 'Pending').scalar_subquery()
+        active_q = db.select(db.func.count(Checkout.id))\
+            .where(Checkout.actual_return.is_(None)).scalar_subquery()
+        pending_maintenance, active_checkouts = db.session.execute(
+            db.select(pending_q, active_q)
+        ).one()
+
+        return cls(asset_counts, status_counts, [], pending_maintenance, active_checkouts)
+
+    @staticmethod
+    def bucket(type_rows, status_rows):
+        """Fold (asset_type, count) and (status, count) rows into the dashboard dicts."""
+        type_keys = {asset_type: key for key, asset_type in DASHBOARD_ASSET_TYPES}
+        asset_counts = {key: 0 for key, _ in DASHBOARD_ASSET_TYPES}
+        asset_counts['other'] = 0
+        status_counts = {status: 0 for status in DASHBOARD_STATUSES}
+
+        for asset_type, count in type_rows:
+            asset_counts[type_keys.get(asset_type, 'other')] += count
+        for status, count in status_rows:
+            if status in status_counts:
+                status_counts[status] += count
+
+        return asset_counts, status_counts
+
+    @property
+    def total_assets(self):
+        return sum(self.asset_counts.values())
+
+    def as_context(self):
+        """Keyword arguments for the dashboard templates and email helpers."""
+        return {
+            'asset_counts': self.asset_counts,
+            'status_counts': self.status_counts,
+            'low_stock': self.low_stock,
+            'pending_maintenance': self.pending_maintenance,
+            'active_checkouts': self.active_checkouts,
+        }
+
+    def as_dict(self):
+        """JSON-serialisable form of the stats for the dashboard API."""
+        return {
+            'asset_counts': self.asset_counts,
+            'status_counts': self.status_counts,
+            'total_assets': self.total_assets,
+            'low_stock': [item._asdict() for item in self.low_stock],
+            'pending_maintenance': self.pending_maintenance,
+            'active_checkouts': self.active_checkouts,
+        }
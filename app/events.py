@@ -0,0 +1,259 @@
+import json
+import select
+from queue import Queue, Empty, Full
+from threading import Lock, Thread
+from time import sleep
+
+from flask import current_app
+from sqlalchemy import event, text
+
+from app import db
+from app.models import Asset, Checkout, Maintenance
+from app.cache import current_data_version
+
+NOTIFY_CHANNEL = 'inventory_events'
+
+
+class Subscriber:
+    """One SSE client: a bounded queue the hub pushes events into."""
+
+    def __init__(self, maxsize):
+        self.queue = Queue(maxsize=maxsize)
+        self.dropped = False
+
+    def get(self, timeout):
+        """Next event, or None if nothing arrived within timeout."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except Empty:
+            return None
+
+
+class EventHub:
+    """In-process publish/subscribe hub for live dashboard events.
+
+    Publishing never blocks: a subscriber whose queue is full is dropped and
+    its stream ends, and the browser's EventSource reconnects and reloads.
+    Each open stream holds a server thread, so at most max_subscribers are
+    admitted at once.
+    """
+
+    def __init__(self, queue_size=100, max_subscribers=4):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = Lock()
+
+    def subscribe(self):
+        """A new subscriber, or None if max_subscribers are already connected."""
+        subscriber = Subscriber(self.queue_size)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, payload):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.queue.put_nowait(payload)
+            except Full:
+                subscriber.dropped = True
+                self.unsubscribe(subscriber)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+hub = EventHub()
+
+
+# -----------------------------
+# Events from model flushes
+# -----------------------------
+
+def _queue_event(target, name, **data):
+    session = db.object_session(target)
+    if session is not None:
+        session.info.setdefault('pending_events', []).append(dict(event=name, **data))
+
+
+def _old_value(target, attr):
+    history = db.inspect(target).attrs[attr].history
+    return history.deleted[0] if history.deleted else getattr(target, attr)
+
+
+@event.listens_for(Asset, 'after_insert')
+def asset_added(mapper, connection, target):
+    _queue_event(target, 'asset', id=target.id, asset_type=target.asset_type,
+                 old_status=None, status=target.status)
+
+
+@event.listens_for(Asset, 'after_update')
+def asset_changed(mapper, connection, target):
+    old_status = _old_value(target, 'status')
+    if old_status != target.status:
+        _queue_event(target, 'asset', id=target.id, asset_type=target.asset_type,
+                     old_status=old_status, status=target.status)
+
+
+@event.listens_for(Asset, 'after_delete')
+def asset_removed(mapper, connection, target):
+    _queue_event(target, 'asset', id=target.id, asset_type=_old_value(target, 'asset_type'),
+                 old_status=_old_value(target, 'status'), status=None)
+
+
+@event.listens_for(Checkout, 'after_insert')
+def checkout_opened(mapper, connection, target):
+    if target.actual_return is None:
+        _queue_event(target, 'checkout', id=target.id, asset_id=target.asset_id, open=True)
+
+
+@event.listens_for(Checkout, 'after_update')
+def checkout_closed(mapper, connection, target):
+    was_open = _old_value(target, 'actual_return') is None
+    is_open = target.actual_return is None
+    if was_open != is_open:
+        _queue_event(target, 'checkout', id=target.id, asset_id=target.asset_id, open=is_open)
+
+
+@event.listens_for(Maintenance, 'after_insert')
+def maintenance_added(mapper, connection, target):
+    _queue_event(target, 'maintenance', id=target.id, old_status=None, status=target.status)
+
+
+@event.listens_for(Maintenance, 'after_update')
+def maintenance_changed(mapper, connection, target):
+    old_status = _old_value(target, 'status')
+    if old_status != target.status:
+        _queue_event(target, 'maintenance', id=target.id, old_status=old_status, status=target.status)
+
+
+def _uses_notify(session):
+    return session.get_bind().dialect.name == 'postgresql'
+
+
+def queue_resync(session, reason):
+    """Tell dashboards to reload their totals after a bulk statement.
+
+    Bulk inserts and updates skip the per-row mapper events above, so they
+    send one 'resync' event instead. It is delivered on commit like the rest.
+    """
+    payload = {'event': 'resync', 'reason': reason}
+    if _uses_notify(session):
+        session.connection().execute(
+            text('SELECT pg_notify(:channel, :payload)'),
+            {'channel': NOTIFY_CHANNEL, 'payload': json.dumps(payload)}
+        )
+    else:
+        session.info.setdefault('pending_events', []).append(payload)
+
+
+# On Postgres, NOTIFY inside the flush's transaction is delivered to every
+# worker's listener only if the transaction commits.
+@event.listens_for(db.session, 'after_flush')
+def notify_pending_events(session, flush_context):
+    if not _uses_notify(session):
+        return
+    events = session.info.pop('pending_events', None)
+    connection = session.connection()
+    for payload in events or ():
+        connection.execute(
+            text('SELECT pg_notify(:channel, :payload)'),
+            {'channel': NOTIFY_CHANNEL, 'payload': json.dumps(payload)}
+        )
+
+
+# Elsewhere (SQLite) publish straight to the local hub; other workers pick
+# the change up from the data version poll below.
+@event.listens_for(db.session, 'after_commit')
+def publish_pending_events(session):
+    for payload in session.info.pop('pending_events', None) or ():
+        hub.publish(payload)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def discard_pending_events(session):
+    session.info.pop('pending_events', None)
+
+
+# -----------------------------
+# Cross-worker fan-out
+# -----------------------------
+
+_listener = None
+_listener_lock = Lock()
+
+
+def _listen(app):
+    """LISTEN on the notify channel and republish into this worker's hub."""
+    while True:
+        try:
+            with app.app_context():
+                connection = db.engine.raw_connection()
+            connection.detach()
+            dbapi = connection.driver_connection
+            dbapi.autocommit = True
+            dbapi.cursor().execute(f'LISTEN {NOTIFY_CHANNEL}')
+            while True:
+                if select.select([dbapi], [], [], 60) == ([], [], []):
+                    continue
+                dbapi.poll()
+                while dbapi.notifies:
+                    notification = dbapi.notifies.pop(0)
+                    hub.publish(json.loads(notification.payload))
+        except Exception as e:
+            app.logger.error(f"Event listener failed, reconnecting: {e}")
+            sleep(5)
+
+
+def _poll_version(app, interval):
+    """Without NOTIFY, watch the data version for writes made by other workers.
+
+    Those writes never reach this worker's hub, so each change is published
+    as one 'resync' event. This worker's own writes are seen too; their
+    per-row events have already gone out, and the extra resync only makes
+    clients reload totals that are already current.
+    """
+    last = None
+    while True:
+        try:
+            with app.app_context():
+                version = current_data_version()
+            if last is not None and version != last:
+                hub.publish({'event': 'resync', 'reason': 'data-version'})
+            last = version
+        except Exception as e:
+            app.logger.error(f"Data version poll failed: {e}")
+        sleep(interval)
+
+
+def ensure_listener():
+    """Start this worker's cross-worker event thread the first time a client subscribes.
+
+    On Postgres it LISTENs for NOTIFY; elsewhere it polls the data version.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    app = current_app._get_current_object()
+    if _uses_notify(db.session):
+        target, args = _listen, (app,)
+    else:
+        target, args = _poll_version, (app, app.config.get('SSE_VERSION_POLL', 5))
+    with _listener_lock:
+        if _listener is None:
+            _listener = Thread(target=target, args=args, daemon=True)
+            _listener.start()
+
+
+def init_events(app):
+    hub.queue_size = app.config.get('SSE_QUEUE_SIZE', 100)
+    hub.max_subscribers = app.config.get('SSE_MAX_SUBSCRIBERS', 4)
@@ -1,14 +1,20 @@
 from flask import (
     render_template, request, jsonify, url_for, redirect,
-    make_response, current_app
+    make_response, current_app, Response
 )
 from flask_login import login_required, current_user
 from app import db
 from app.main import bp
-from app.models import Asset, Stationery, Maintenance, Checkout
+from app.models import Asset
+from app.dashboard import DashboardStats
+from app.cache import dashboard_cache, current_data_version
+from app.events import hub, ensure_listener
 from app.email import send_dashboard_report_email
+from app.scans import MAX_SCANS, parse_qr, resolve_scans, scan_result
 from io import StringIO
+from time import monotonic
 import csv
+import json
 
 # ----------------------------
 # Root & Info Routes
@@ -34,41 +40,75 @@ def info():
 @login_required
 def dashboard():
     """Render the main dashboard with asset summaries."""
+    stats = DashboardStats.cached()
+    return render_template('pages/dashboard.html', **stats.as_context())
 
-    asset_counts = {
-    'monitor': Asset.query.filter_by(asset_type='Monitor').count(),
-    'keyboard': Asset.query.filter_by(asset_type='Keyboard').count(),
-    'cpu': Asset.query.filter_by(asset_type='CPU').count(),
-    'mouse': Asset.query.filter_by(asset_type='Mouse').count(),
-    'printer': Asset.query.filter_by(asset_type='Printer').count(),  # ✅ add this
-    'server': Asset.query.filter_by(asset_type='Server').count(),    # ✅ add this
-    'other': Asset.query.filter(
-        Asset.asset_type.notin_([
-            'Monitor', 'Keyboard', 'CPU', 'Mouse', 'Printer', 'Server'
-        ])
-    ).count()
-}
-
-
-    status_counts = {
-        'Available': Asset.query.filter_by(status='Available').count(),
-        'In-use': Asset.query.filter_by(status='In-use').count(),
-        'Maintenance': Asset.query.filter_by(status='Maintenance').count(),
-        'Out of Service': Asset.query.filter_by(status='Out of Service').count()
-    }
-
-    low_stock = Stationery.query.filter(Stationery.quantity < Stationery.threshold).all()
-    pending_maintenance = Maintenance.query.filter_by(status='Pending').count()
-    active_checkouts = Checkout.query.filter(Checkout.actual_return == None).count()
-
-    return render_template(
-        'pages/dashboard.html',
-        asset_counts=asset_counts,
-        status_counts=status_counts,
-        low_stock=low_stock,
-        pending_maintenance=pending_maintenance,
-        active_checkouts=active_checkouts
-    )
+
+# ----------------------------
+# Dashboard JSON API
+# ----------------------------
+
+@bp.route('/api/dashboard')
+@login_required
+def dashboard_api():
+    """Dashboard stats as JSON, revalidated with an ETag on the data version."""
+    version = current_data_version()
+    etag = f'dashboard-{version}'
+
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        stats = DashboardStats.cached()
+        response = jsonify(version=version, **stats.as_dict())
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+# ----------------------------
+# Live Dashboard Events (SSE)
+# ----------------------------
+
+@bp.route('/api/events')
+@login_required
+def dashboard_events():
+    """Server-Sent Events stream of asset, checkout and maintenance changes.
+
+    Every open stream holds a server thread: past SSE_MAX_SUBSCRIBERS the
+    client gets a 503 and polls instead, and each stream is closed after
+    SSE_MAX_STREAM_AGE seconds so the browser reconnects.
+    """
+    ensure_listener()
+    subscriber = hub.subscribe()
+    if subscriber is None:
+        retry = current_app.config.get('SSE_BUSY_RETRY', 30)
+        return Response(f'retry: {retry * 1000}\n\n', 503, mimetype='text/event-stream', headers={
+            'Cache-Control': 'no-cache',
+            'Retry-After': str(retry)
+        })
+    heartbeat = current_app.config.get('SSE_HEARTBEAT', 15)
+    deadline = monotonic() + current_app.config.get('SSE_MAX_STREAM_AGE', 300)
+
+    def stream():
+        try:
+            yield 'retry: 5000\n\n'
+            while not subscriber.dropped:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    break
+                payload = subscriber.get(timeout=min(heartbeat, remaining))
+                if payload is None:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield f"event: {payload['event']}\ndata: {json.dumps(payload)}\n\n"
+        finally:
+            hub.unsubscribe(subscriber)
+
+    return Response(stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
 
 
 # ----------------------------
@@ -84,36 +124,36 @@ def scan_qr():
         return jsonify({'error': 'Invalid QR data'}), 400
 
     try:
-        # Parse QR string into key-value pairs
-        asset_info = {}
-        for line in data['qr_data'].split('\n'):
-            if ': ' in line:
-                key, value = line.split(': ', 1)
-                asset_info[key.strip().lower()] = value.strip()
-
+        asset_info = parse_qr(data['qr_data'])
         asset_id = int(asset_info.get('asset id', 0))
         asset = Asset.query.get(asset_id)
 
         if not asset:
             return jsonify({'error': 'Asset not found'}), 404
 
-        return jsonify({
-            'id': asset.id,
-            'name': asset.name,
-            'serial_number': asset.serial_number,
-            'type': asset.asset_type,
-            'location': asset.location,
-            'status': asset.status,
-            'qr_code': asset.qr_code,
-            'checkout_url': url_for('checkout.checkout_asset', asset_id=asset.id),
-            'maintenance_url': url_for('maintenance.add_maintenance', asset_id=asset.id),
-            'details_url': url_for('assets.asset_details', asset_id=asset.id)
-        })
+        return jsonify(scan_result(asset))
 
     except Exception as e:
         current_app.logger.error(f"QR scan error: {str(e)}")
         return jsonify({'error': 'Server error during QR scan'}), 500
 
+@bp.route('/scan_qr/batch', methods=['POST'])
+@login_required
+def scan_qr_batch():
+    """Resolve a queue of offline scans: {"qr_data": [payload, ...]} -> results in order."""
+    data = request.get_json(silent=True)
+    payloads = data.get('qr_data') if isinstance(data, dict) else None
+    if not isinstance(payloads, list) or not payloads:
+        return jsonify({'error': 'qr_data must be a non-empty list of QR payloads'}), 400
+    if len(payloads) > MAX_SCANS:
+        return jsonify({'error': f'At most {MAX_SCANS} scans per request'}), 400
+
+    try:
+        return jsonify({'results': resolve_scans(payloads)})
+    except Exception as e:
+        current_app.logger.error(f"Batch QR scan error: {str(e)}")
+        return jsonify({'error': 'Server error during QR scan'}), 500
+
 # ----------------------------
 # Email Dashboard Report
 # ----------------------------
@@ -127,40 +167,8 @@ def send_dashboard_email_route():
 
     try:
         email = data['email']
-
-        asset_counts = {
-            'monitor': Asset.query.filter_by(asset_type='Monitor').count(),
-            'keyboard': Asset.query.filter_by(asset_type='Keyboard').count(),
-            'cpu': Asset.query.filter_by(asset_type='CPU').count(),
-            'mouse': Asset.query.filter_by(asset_type='Mouse').count(),
-            'printer': Asset.query.filter_by(asset_type='Printer').count(),
-            'server': Asset.query.filter_by(asset_type='Server').count(),
-            'other': Asset.query.filter(
-                Asset.asset_type.notin_([
-                    'Monitor', 'Keyboard', 'CPU', 'Mouse', 'Printer', 'Server'
-                ])
-            ).count()
-        }
-
-        status_counts = {
-            'Available': Asset.query.filter_by(status='Available').count(),
-            'In-use': Asset.query.filter_by(status='In-use').count(),
-            'Maintenance': Asset.query.filter_by(status='Maintenance').count(),
-            'Out of Service': Asset.query.filter_by(status='Out of Service').count()
-        }
-
-        low_stock = Stationery.query.filter(Stationery.quantity < Stationery.threshold).all()
-        pending_maintenance = Maintenance.query.filter_by(status='Pending').count()
-        active_checkouts = Checkout.query.filter(Checkout.actual_return == None).count()
-
-        send_dashboard_report_email(
-            asset_counts,
-            status_counts,
-            low_stock,
-            pending_maintenance,
-            active_checkouts,
-            recipient=email
-        )
+        stats = DashboardStats.cached()
+        send_dashboard_report_email(**stats.as_context(), recipient=email)
 
         return jsonify({'success': True})
 
@@ -172,48 +180,32 @@ def send_dashboard_email_route():
 # Export Dashboard as CSV
 # ----------------------------
 
+def _dashboard_csv():
+    stats = DashboardStats.cached()
+
+    output = StringIO()
+    writer = csv.writer(output)
+    writer.writerow(['Section', 'Category', 'Count'])
+
+    for category, count in stats.asset_counts.items():
+        writer.writerow(['Asset Type', category.title(), count])
+
+    for status, count in stats.status_counts.items():
+        writer.writerow(['Status', status, count])
+
+    writer.writerow(['Other', 'Pending Maintenance', stats.pending_maintenance])
+    writer.writerow(['Other', 'Active Checkouts', stats.active_checkouts])
+    return output.getvalue()
+
+
 @bp.route('/export-dashboard')
 @login_required
 def export_dashboard():
     try:
-        asset_counts = {
-            'monitor': Asset.query.filter_by(asset_type='Monitor').count(),
-            'keyboard': Asset.query.filter_by(asset_type='Keyboard').count(),
-            'cpu': Asset.query.filter_by(asset_type='CPU').count(),
-            'mouse': Asset.query.filter_by(asset_type='Mouse').count(),
-            'printer': Asset.query.filter_by(asset_type='Printer').count(),
-            'server': Asset.query.filter_by(asset_type='Server').count(),
-            'other': Asset.query.filter(
-                Asset.asset_type.notin_([
-                    'Monitor', 'Keyboard', 'CPU', 'Mouse', 'Printer', 'Server'
-                ])
-            ).count()
-        }
-
-        status_counts = {
-            'Available': Asset.query.filter_by(status='Available').count(),
-            'In-use': Asset.query.filter_by(status='In-use').count(),
-            'Maintenance': Asset.query.filter_by(status='Maintenance').count(),
-            'Out of Service': Asset.query.filter_by(status='Out of Service').count()
-        }
-
-        pending_maintenance = Maintenance.query.filter_by(status='Pending').count()
-        active_checkouts = Checkout.query.filter(Checkout.actual_return == None).count()
-
-        output = StringIO()
-        writer = csv.writer(output)
-        writer.writerow(['Section', 'Category', 'Count'])
-
-        for category, count in asset_counts.items():
-            writer.writerow(['Asset Type', category.title(), count])
-
-        for status, count in status_counts.items():
-            writer.writerow(['Status', status, count])
-
-        writer.writerow(['Other', 'Pending Maintenance', pending_maintenance])
-        writer.writerow(['Other', 'Active Checkouts', active_checkouts])
-
-        response = make_response(output.getvalue())
+        version = current_data_version()
+        csv_data = dashboard_cache.get_or_set('dashboard_csv', version, _dashboard_csv)
+
+        response = make_response(csv_data)
         response.headers['Content-Disposition'] = 'attachment; filename=dashboard_report.csv'
         response.headers['Content-Type'] = 'text/csv'
         return response
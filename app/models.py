@@ -6,6 +6,7 @@ from time import time
 import jwt
 from flask import current_app
 from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
 
 # -----------------------------
 # User Model
@@ -64,6 +65,17 @@ class User(UserMixin, db.Model):
 # -----------------------------
 # Asset Model
 # -----------------------------
+def lookup_key(text):
+    """Case-folded name or serial number, as stored for typeahead prefix lookups."""
+    return None if text is None else text.casefold()
+
+
+def _lookup_key_type(length):
+    # Compared by code point: SQLite's default BINARY collation does this, and
+    # on Postgres "C" keeps range scans independent of the database locale
+    return db.String(length).with_variant(postgresql.VARCHAR(length, collation='C'), 'postgresql')
+
+
 class Asset(db.Model):
     __tablename__ = 'asset'
 
@@ -71,9 +83,15 @@ class Asset(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     name = db.Column(db.String(100), nullable=False)
     serial_number = db.Column(db.String(50), unique=True, nullable=False)
-    asset_type = db.Column(db.String(50), nullable=False, index=True)
-    location = db.Column(db.String(50), index=True)
-    status = db.Column(db.String(20), default='Available', index=True)
+    # lookup_key() of name and serial_number, kept in step by set_lookup_keys
+    name_key = db.Column(_lookup_key_type(100), index=True)
+    serial_key = db.Column(_lookup_key_type(50), index=True)
+    # Counted columns (see COUNTED_ATTRIBUTES) keep their old value on assignment
+    asset_type = db.column_property(
+        db.Column(db.String(50), nullable=False, index=True), active_history=True)
+    location = db.column_property(db.Column(db.String(50), index=True), active_history=True)
+    status = db.column_property(
+        db.Column(db.String(20), default='Available', index=True), active_history=True)
     condition = db.Column(db.String(100))
     notes = db.Column(db.Text)
     last_updated = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
@@ -89,6 +107,14 @@ class Asset(db.Model):
     maintenance = db.relationship('Maintenance', backref='asset', lazy='dynamic')
     checkouts = db.relationship('Checkout', backref='asset', lazy='dynamic')
 
+    # The asset list is ordered and keyset-paginated by (name, id);
+    # the typeahead lookup range-scans name_key and serial_key;
+    # the scan serial index reads rows changed since its last refresh
+    __table_args__ = (
+        db.Index('ix_asset_name_id', 'name', 'id'),
+        db.Index('ix_asset_last_updated', 'last_updated'),
+    )
+
     def __repr__(self):
         return f'<Asset {self.name} - {self.serial_number}>'
 
@@ -98,6 +124,13 @@ def update_asset_timestamp(mapper, connection, target):
     target.last_updated = datetime.utcnow()
 
 
+@event.listens_for(Asset, 'before_insert')
+@event.listens_for(Asset, 'before_update')
+def set_lookup_keys(mapper, connection, target):
+    target.name_key = lookup_key(target.name)
+    target.serial_key = lookup_key(target.serial_number)
+
+
 # -----------------------------
 # AssetTransfer Model
 # -----------------------------
@@ -109,11 +142,18 @@ class AssetTransfer(db.Model):
     from_location = db.Column(db.String(50), nullable=False)
     to_location = db.Column(db.String(50), nullable=False)
     transferred_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    transfer_date = db.Column(db.DateTime, default=datetime.utcnow)
+    transfer_date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     asset = db.relationship('Asset', backref='transfers')
     user = db.relationship('User', backref='transfers')
 
+    # Transfer history is keyset-paginated by (transfer_date, id), newest first,
+    # across all assets and within one asset's history panel
+    __table_args__ = (
+        db.Index('ix_asset_transfer_date_id', 'transfer_date', 'id'),
+        db.Index('ix_asset_transfer_asset_date_id', 'asset_id', 'transfer_date', 'id'),
+    )
+
     def __repr__(self):
         return f'<Transfer {self.asset.name} from {self.from_location} to {self.to_location}>'
 
@@ -150,12 +190,17 @@ class Maintenance(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     asset_id = db.Column(db.Integer, db.ForeignKey('asset.id'))
-    start_date = db.Column(db.DateTime, default=datetime.utcnow)
+    start_date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     end_date = db.Column(db.DateTime)
     description = db.Column(db.Text)
     cost = db.Column(db.Float)
     technician = db.Column(db.String(100))
-    status = db.Column(db.String(20), default='Pending')
+    status = db.column_property(db.Column(db.String(20), default='Pending'), active_history=True)
+
+    # An asset's maintenance history is keyset-paginated by (start_date, id)
+    __table_args__ = (
+        db.Index('ix_maintenance_asset_start_id', 'asset_id', 'start_date', 'id'),
+    )
 
     def __repr__(self):
         asset_name = self.asset.name if self.asset else "Unknown"
@@ -172,19 +217,240 @@ class Checkout(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     asset_id = db.Column(db.Integer, db.ForeignKey('asset.id'))
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
-    checkout_date = db.Column(db.DateTime, default=datetime.utcnow)
+    checkout_date = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     expected_return = db.Column(db.DateTime)
-    actual_return = db.Column(db.DateTime)
+    actual_return = db.column_property(db.Column(db.DateTime), active_history=True)
     condition_out = db.Column(db.String(100))
     condition_in = db.Column(db.String(100))
     notes = db.Column(db.Text)
 
+    # Date-range reports filter and page on checkout_date (newest first);
+    # an asset's history panel pages on the same keys within one asset
+    __table_args__ = (
+        db.Index('ix_checkout_checkout_date_id', 'checkout_date', 'id'),
+        db.Index('ix_checkout_asset_date_id', 'asset_id', 'checkout_date', 'id'),
+    )
+
     def __repr__(self):
         asset_name = self.asset.name if self.asset else "Unknown"
         username = self.user.username if self.user else "Unknown"
         return f'<Checkout {asset_name} by {username}>'
 
 
+# -----------------------------
+# Daily Rollup Models
+# -----------------------------
+class DailyAssetRollup(db.Model):
+    """Asset count per (location, asset_type, status) at the end of a day."""
+    __tablename__ = 'daily_asset_rollup'
+
+    id = db.Column(db.Integer, primary_key=True)
+    snapshot_date = db.Column(db.Date, nullable=False)
+    location = db.Column(db.String(50))
+    asset_type = db.Column(db.String(50), nullable=False)
+    status = db.Column(db.String(20))
+    count = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_daily_asset_rollup_date', 'snapshot_date', 'location', 'asset_type', 'status'),
+    )
+
+    def __repr__(self):
+        return f'<DailyAssetRollup {self.snapshot_date} {self.location}/{self.asset_type}/{self.status}: {self.count}>'
+
+
+class DailyStationeryRollup(db.Model):
+    """Quantity of each stationery item at the end of a day."""
+    __tablename__ = 'daily_stationery_rollup'
+
+    id = db.Column(db.Integer, primary_key=True)
+    snapshot_date = db.Column(db.Date, nullable=False, index=True)
+    stationery_id = db.Column(db.Integer, nullable=False)
+    item_type = db.Column(db.String(50), nullable=False)
+    location = db.Column(db.String(50))
+    quantity = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f'<DailyStationeryRollup {self.snapshot_date} {self.item_type}: {self.quantity}>'
+
+
+class DailyActivityRollup(db.Model):
+    """Open checkout and open maintenance counts at the end of a day."""
+    __tablename__ = 'daily_activity_rollup'
+
+    snapshot_date = db.Column(db.Date, primary_key=True)
+    open_checkouts = db.Column(db.Integer, nullable=False)
+    open_maintenance = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f'<DailyActivityRollup {self.snapshot_date}>'
+
+
+# -----------------------------
+# InventoryCounter Model
+# -----------------------------
+class InventoryCounter(db.Model):
+    """Running row counts keyed by (dimension, value), e.g. status=In-use.
+
+    Kept in step with Asset, Checkout and Maintenance by the flush hooks
+    below; `flask counters rebuild` recomputes it from scratch.
+    """
+    __tablename__ = 'inventory_counters'
+
+    dimension = db.Column(db.String(32), primary_key=True)
+    value = db.Column(db.String(100), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<InventoryCounter {self.dimension}={self.value}: {self.count}>'
+
+
+# Counted columns per model: (dimension, attribute, value function). Each is
+# declared with active_history=True so its old value is in the attribute history.
+COUNTED_ATTRIBUTES = {
+    Asset: [
+        ('asset_type', 'asset_type', lambda v: v),
+        ('status', 'status', lambda v: v),
+        ('location', 'location', lambda v: v),
+    ],
+    Maintenance: [
+        ('maintenance_status', 'status', lambda v: v),
+    ],
+    Checkout: [
+        ('checkout', 'actual_return', lambda v: 'open' if v is None else 'returned'),
+    ],
+}
+
+
+def _counter_keys(target, old=False):
+    """(dimension, value) keys a row contributes, before or after the flush."""
+    state = db.inspect(target)
+    keys = []
+    for dimension, attr, to_value in COUNTED_ATTRIBUTES[type(target)]:
+        value = getattr(target, attr)
+        if old:
+            history = state.attrs[attr].history
+            if history.deleted:
+                value = history.deleted[0]
+        value = to_value(value)
+        keys.append((dimension, '' if value is None else str(value)))
+    return keys
+
+
+def _add_counter_delta(target, keys, delta):
+    session = db.object_session(target)
+    if session is None:
+        return
+    deltas = session.info.setdefault('counter_deltas', {})
+    for key in keys:
+        deltas[key] = deltas.get(key, 0) + delta
+
+
+def _count_insert(mapper, connection, target):
+    _add_counter_delta(target, _counter_keys(target), 1)
+
+
+def _count_update(mapper, connection, target):
+    old_keys = _counter_keys(target, old=True)
+    new_keys = _counter_keys(target)
+    if old_keys != new_keys:
+        _add_counter_delta(target, old_keys, -1)
+        _add_counter_delta(target, new_keys, 1)
+
+
+def _count_delete(mapper, connection, target):
+    _add_counter_delta(target, _counter_keys(target, old=True), -1)
+
+
+for _model in COUNTED_ATTRIBUTES:
+    event.listen(_model, 'after_insert', _count_insert)
+    event.listen(_model, 'after_update', _count_update)
+    event.listen(_model, 'after_delete', _count_delete)
+
+
+def upsert(connection, table, rows, key, update):
+    """INSERT rows, or on a key conflict apply update(table, excluded) instead.
+
+    A single ON CONFLICT statement, so concurrent writers creating the same
+    row never fail on the primary key and roll back the caller's save.
+    update returns the {column: expression} to set on the existing row.
+    """
+    insert = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}[connection.dialect.name]
+    statement = insert(table).values(rows)
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=key, set_=update(table, statement.excluded)
+    ))
+
+
+def apply_counter_deltas(connection, deltas):
+    """Add {(dimension, value): delta} to inventory_counters on a connection."""
+    rows = [
+        {'dimension': dimension, 'value': value, 'count': delta}
+        for (dimension, value), delta in deltas.items() if delta
+    ]
+    if rows:
+        upsert(connection, InventoryCounter.__table__, rows, ['dimension', 'value'],
+               lambda table, excluded: {'count': table.c.count + excluded.count})
+
+
+@event.listens_for(db.session, 'before_flush')
+def reset_counter_deltas(session, flush_context, instances):
+    session.info['counter_deltas'] = {}
+
+
+# Write the collected deltas in the same transaction as the flush
+@event.listens_for(db.session, 'after_flush')
+def flush_counter_deltas(session, flush_context):
+    deltas = session.info.pop('counter_deltas', None)
+    if deltas:
+        apply_counter_deltas(session.connection(), deltas)
+
+
+# -----------------------------
+# DataVersion Model
+# -----------------------------
+class DataVersion(db.Model):
+    """Single-row counter bumped by every flush that writes inventory data.
+
+    Cached dashboard and export data is keyed by this version, so it is
+    invalidated exactly when Asset, Stationery, Maintenance or Checkout
+    rows change, in every worker process.
+    """
+    __tablename__ = 'inventory_data_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<DataVersion {self.version}>'
+
+
+VERSIONED_MODELS = (Asset, Stationery, Maintenance, Checkout)
+
+
+def _mark_data_changed(mapper, connection, target):
+    session = db.object_session(target)
+    if session is not None:
+        session.info['data_changed'] = True
+
+
+for _model in VERSIONED_MODELS:
+    for _event in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event, _mark_data_changed)
+
+
+def bump_data_version(connection):
+    """Increment the inventory data version on a connection."""
+    upsert(connection, DataVersion.__table__, [{'id': 1, 'version': 1}], ['id'],
+           lambda table, excluded: {'version': table.c.version + 1})
+
+
+@event.listens_for(db.session, 'after_flush')
+def flush_data_version(session, flush_context):
+    if session.info.pop('data_changed', False):
+        bump_data_version(session.connection())
+
+
 # -----------------------------
 # Flask-Login Integration
 # -----------------------------
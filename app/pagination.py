@@ -0,0 +1,98 @@
+import base64
+import json
+from datetime import datetime
+
+from app import db
+
+
+def encode_cursor(direction, values):
+    """Opaque URL-safe cursor for a page boundary: direction plus its sort key values."""
+    raw = json.dumps([direction, [
+        {'dt': value.isoformat()} if isinstance(value, datetime) else value
+        for value in values
+    ]])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, length):
+    """(direction, values) from a cursor, or None if it is missing or malformed."""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        direction, values = json.loads(raw)
+        values = [
+            datetime.fromisoformat(value['dt']) if isinstance(value, dict) else value
+            for value in values
+        ]
+    except (ValueError, TypeError, KeyError):
+        return None
+    if direction not in ('next', 'prev') or len(values) != length:
+        return None
+    return direction, values
+
+
+class KeysetPage:
+    """One page of a keyset-paginated query, with cursors for its neighbours."""
+
+    def __init__(self, items, next_cursor, prev_cursor, per_page, total=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.per_page = per_page
+        self.total = total
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def keyset_paginate(query, keys, cursor=None, per_page=10, descending=False, total=None):
+    """Page through query by its sort keys instead of OFFSET.
+
+    keys are the columns (or expressions) the list is ordered by and must
+    end with a unique column such as the primary key; all of them sort in
+    the same direction. Keys must be NOT NULL columns: a row-value
+    comparison is never true for a NULL, so such rows would be skipped. Each page seeks straight past the last row seen with
+    a row-value comparison, so page 1000 costs the same as page 1, and no
+    COUNT(*) is run. total, if the caller knows or estimates it, is passed
+    through for display.
+    """
+    position = decode_cursor(cursor, len(keys))
+    backwards = position is not None and position[0] == 'prev'
+
+    # Walking backwards flips the sort, then the page is reversed again below
+    reverse = descending != backwards
+    order = [key.desc() if reverse else key.asc() for key in keys]
+    query = query.add_columns(*keys).order_by(None).order_by(*order)
+    if position is not None:
+        row_key = db.tuple_(*keys)
+        values = db.tuple_(*[db.literal(value) for value in position[1]])
+        query = query.filter(row_key < values if reverse else row_key > values)
+
+    rows = query.limit(per_page + 1).all()
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    items = [row[0] for row in rows]
+    first_key = list(rows[0][1:]) if rows else None
+    last_key = list(rows[-1][1:]) if rows else None
+
+    if backwards:
+        has_prev, has_next = more, True
+    else:
+        has_prev, has_next = position is not None, more
+
+    return KeysetPage(
+        items,
+        encode_cursor('next', last_key) if has_next and rows else None,
+        encode_cursor('prev', first_key) if has_prev and rows else None,
+        per_page,
+        total
+    )
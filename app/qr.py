@@ -0,0 +1,107 @@
+import hashlib
+import io
+import os
+import uuid
+
+from flask import url_for
+
+# Image format -> mimetype
+QR_FORMATS = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml',
+}
+
+# Bump when the rendering settings change, so cached images are re-made
+QR_RENDER_VERSION = 1
+
+
+def qr_payload(asset_id, serial_number, details_url=None):
+    """Text encoded in an asset's QR code, in the format main.scan_qr parses."""
+    if details_url is None:
+        details_url = url_for('assets.asset_details', asset_id=asset_id, _external=True)
+    return f"Asset ID: {asset_id}\nSerial: {serial_number}\nURL: {details_url}"
+
+
+def qr_key(payload, format, box_size=8):
+    """Content address of a rendered QR image: a hash of everything that shapes it."""
+    raw = f"{QR_RENDER_VERSION}\n{format}\n{box_size}\n{payload}"
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def render_qr(payload, format, box_size=8):
+    """Encode payload as a PNG or SVG QR code and return the image bytes.
+
+    box_size is the pixels per module; 1 gives the bare module grid, for
+    callers such as PDF labels that scale the image themselves.
+    """
+    import qrcode
+    qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=box_size, border=2)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    if format == 'svg':
+        from qrcode.image.svg import SvgPathImage
+        image = qr.make_image(image_factory=SvgPathImage)
+    else:
+        image = qr.make_image()
+    output = io.BytesIO()
+    image.save(output)
+    return output.getvalue()
+
+
+class QRCache:
+    """On-disk cache of rendered QR images, addressed by payload hash.
+
+    A file's name is the hash of what it encodes, so an entry never goes
+    stale: when an asset's payload changes it simply maps to a new file.
+    """
+
+    def __init__(self):
+        self.cache_dir = None
+
+    def init_app(self, app):
+        self.cache_dir = app.config.get('QR_CACHE_DIR') or \
+            os.path.join(app.instance_path, 'qr_cache')
+        os.makedirs(self.cache_dir, exist_ok=True)
+        app.add_template_global(self.image_url, 'qr_url')
+
+    def path(self, key, format):
+        # Two-character shards keep directories small with many assets
+        return os.path.join(self.cache_dir, key[:2], f'{key}.{format}')
+
+    def ensure(self, payload, format, box_size=8):
+        """Key for payload's image, rendering and storing it only if it is not cached."""
+        key = qr_key(payload, format, box_size)
+        if not os.path.exists(self.path(key, format)):
+            self.store(key, format, render_qr(payload, format, box_size))
+        return key
+
+    def load(self, key, format):
+        """Cached image bytes, or None if the key has not been rendered yet."""
+        try:
+            with open(self.path(key, format), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def store(self, key, format, data):
+        # Write then rename, so a concurrent reader never sees a partial file
+        path = self.path(key, format)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def asset_key(self, asset, format='png'):
+        return self.ensure(qr_payload(asset.id, asset.serial_number), format)
+
+    def image_url(self, asset, format='png'):
+        """Immutable, content-addressed URL of an asset's QR image (qr_url in templates)."""
+        return url_for('assets.qr_image', key=self.asset_key(asset, format), format=format)
+
+
+qr_cache = QRCache()
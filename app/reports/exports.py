@@ -0,0 +1,266 @@
+import csv
+import json
+from datetime import date, datetime, timedelta
+from io import StringIO
+from tempfile import SpooledTemporaryFile
+
+from openpyxl import Workbook
+
+from app import db
+from app.models import Asset, Stationery, Checkout, Maintenance
+
+# Report type -> (model, download filename)
+REPORT_MODELS = {
+    'assets': (Asset, 'assets_report'),
+    'stationery': (Stationery, 'stationery_report'),
+    'checkouts': (Checkout, 'checkouts_report'),
+    'maintenance': (Maintenance, 'maintenance_report'),
+}
+
+# Column the ?start= / ?end= export filters apply to, per report type
+REPORT_DATE_COLUMNS = {
+    'assets': 'created_at',
+    'stationery': 'created_at',
+    'checkouts': 'checkout_date',
+    'maintenance': 'start_date',
+}
+
+EXPORT_BATCH_SIZE = 1000
+
+# Exports larger than this spill from memory to a temporary file on disk
+SPOOL_MAX_SIZE = 8 * 1024 * 1024
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# Streamed text formats: format -> (file extension, mimetype)
+STREAM_FORMATS = {
+    'csv': ('csv', 'text/csv'),
+    'ndjson': ('ndjson', 'application/x-ndjson'),
+}
+
+# Columnar formats: format -> (file extension, mimetype)
+COLUMNAR_FORMATS = {
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('arrow', 'application/vnd.apache.arrow.file'),
+}
+
+# Flush streamed output once this many characters are buffered
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Rows per Parquet row group / Arrow record batch
+COLUMNAR_BATCH_SIZE = 10000
+
+
+def parse_export_filters(report_type, args):
+    """Validate ?columns=a,b&start=YYYY-MM-DD&end=YYYY-MM-DD from a request.
+
+    Returns a plain dict (safe to hash into a cache key) holding only the
+    filters that were given. Raises ValueError on unknown columns or bad dates.
+    """
+    model, _ = REPORT_MODELS[report_type]
+    filters = {}
+
+    columns = args.get('columns', '').strip()
+    if columns:
+        names = [name.strip() for name in columns.split(',') if name.strip()]
+        unknown = [name for name in names if name not in model.__table__.columns]
+        if unknown:
+            raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+        filters['columns'] = ','.join(names)
+
+    for key in ('start', 'end'):
+        value = args.get(key, '').strip()
+        if value:
+            datetime.strptime(value, '%Y-%m-%d')
+            filters[key] = value
+
+    return filters
+
+
+def report_columns(report_type, filters=None):
+    """Table columns of a report's model, in table order or as projected."""
+    model, _ = REPORT_MODELS[report_type]
+    table_columns = model.__table__.columns
+    if filters and filters.get('columns'):
+        return [table_columns[name] for name in filters['columns'].split(',')]
+    return list(table_columns)
+
+
+def report_where(report_type, filters=None):
+    """SQL predicates for the date-range filters; the end date is inclusive."""
+    if not filters:
+        return []
+    model, _ = REPORT_MODELS[report_type]
+    column = model.__table__.columns[REPORT_DATE_COLUMNS[report_type]]
+    clauses = []
+    if filters.get('start'):
+        clauses.append(column >= datetime.strptime(filters['start'], '%Y-%m-%d'))
+    if filters.get('end'):
+        clauses.append(column < datetime.strptime(filters['end'], '%Y-%m-%d') + timedelta(days=1))
+    return clauses
+
+
+def stream_select(stmt, batch_size=EXPORT_BATCH_SIZE, progress=None):
+    """Yield batches of result rows for a select from a server-side cursor.
+
+    progress, if given, is called with the number of rows in each batch.
+    """
+    result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+    for partition in result.partitions():
+        if progress:
+            progress(len(partition))
+        yield partition
+
+
+def stream_rows(columns, order_by, batch_size=EXPORT_BATCH_SIZE, where=(), progress=None):
+    """Yield result rows one at a time, fetched in batches."""
+    stmt = db.select(*columns).where(*where).order_by(order_by)
+    for partition in stream_select(stmt, batch_size, progress):
+        yield from partition
+
+
+def stream_report_rows(report_type, batch_size=EXPORT_BATCH_SIZE, progress=None, filters=None):
+    columns = report_columns(report_type, filters)
+    model, _ = REPORT_MODELS[report_type]
+    return stream_rows(columns, model.id, batch_size,
+                       where=report_where(report_type, filters), progress=progress)
+
+
+def count_report_rows(report_type, filters=None):
+    model, _ = REPORT_MODELS[report_type]
+    return db.session.query(db.func.count(model.id))\
+        .filter(*report_where(report_type, filters)).scalar()
+
+
+def write_excel(report_type, progress=None, filters=None):
+    """Write a report to a spooled .xlsx file with openpyxl's write-only mode.
+
+    Rows go from the cursor straight into the sheet, so memory stays flat
+    however many rows the table has. Returns the file rewound to the start.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Report')
+    sheet.append([column.name for column in report_columns(report_type, filters)])
+    for row in stream_report_rows(report_type, progress=progress, filters=filters):
+        sheet.append(list(row))
+
+    output = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+def _chunked(lines):
+    """Join small pieces of output into roughly STREAM_CHUNK_SIZE chunks.
+
+    The first piece is sent on its own so the client gets a response
+    before the query has produced its first batch.
+    """
+    lines = iter(lines)
+    first = next(lines, '')
+    if first:
+        yield first
+    buffer = StringIO()
+    for line in lines:
+        buffer.write(line)
+        if buffer.tell() >= STREAM_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def _csv_lines(report_type, progress=None, filters=None):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+
+    def line(values):
+        writer.writerow(values)
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    yield line([column.name for column in report_columns(report_type, filters)])
+    for row in stream_report_rows(report_type, progress=progress, filters=filters):
+        yield line(row)
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _ndjson_lines(report_type, progress=None, filters=None):
+    names = [column.name for column in report_columns(report_type, filters)]
+    for row in stream_report_rows(report_type, progress=progress, filters=filters):
+        yield json.dumps(dict(zip(names, row)), default=_json_default) + '\n'
+
+
+def iter_stream_export(report_type, format, progress=None, filters=None):
+    """Generate a CSV or NDJSON export chunk by chunk from a server-side cursor."""
+    lines_for = _csv_lines if format == 'csv' else _ndjson_lines
+    lines = lines_for(report_type, progress, filters)
+    return _chunked(lines)
+
+
+def _arrow_type(pa, column):
+    """Arrow type for a SQLAlchemy column, so exports keep typed columns."""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return pa.string()
+    if python_type is bool:
+        return pa.bool_()
+    if python_type is int:
+        return pa.int64()
+    if python_type is float:
+        return pa.float64()
+    if python_type is datetime:
+        return pa.timestamp('us')
+    if python_type is date:
+        return pa.date32()
+    return pa.string()
+
+
+def write_columnar(report_type, format, progress=None, filters=None):
+    """Write a report as Parquet or Arrow IPC into a spooled file.
+
+    Rows are read COLUMNAR_BATCH_SIZE at a time and each batch becomes one
+    Parquet row group or Arrow record batch, so memory is bounded by the
+    batch size. Returns the file rewound to the start.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    columns = report_columns(report_type, filters)
+    schema = pa.schema([
+        pa.field(column.name, _arrow_type(pa, column), nullable=True)
+        for column in columns
+    ])
+    model, _ = REPORT_MODELS[report_type]
+    stmt = db.select(*columns).where(*report_where(report_type, filters)).order_by(model.id)
+
+    output = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    sink = pa.PythonFile(output, mode='w')
+    if format == 'parquet':
+        writer = pq.ParquetWriter(sink, schema, compression='snappy')
+        write_batch = writer.write_batch
+    else:
+        writer = pa.ipc.new_file(sink, schema)
+        write_batch = writer.write_batch
+
+    try:
+        for partition in stream_select(stmt, COLUMNAR_BATCH_SIZE, progress):
+            arrays = [
+                pa.array([row[i] for row in partition], type=field.type)
+                for i, field in enumerate(schema)
+            ]
+            write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+    finally:
+        writer.close()
+
+    output.seek(0)
+    return output
@@ -0,0 +1,192 @@
+import hashlib
+import json
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import time
+
+from app.cache import current_data_version
+from app.reports.exports import (
+    REPORT_MODELS, STREAM_FORMATS, COLUMNAR_FORMATS, XLSX_MIMETYPE,
+    write_excel, write_columnar, iter_stream_export, count_report_rows
+)
+from app.reports.pdf import write_pdf
+
+# Export format -> (file extension, mimetype)
+EXPORT_FILES = {
+    'excel': ('xlsx', XLSX_MIMETYPE),
+    'pdf': ('pdf', 'application/pdf'),
+    **STREAM_FORMATS,
+    **COLUMNAR_FORMATS,
+}
+
+# Finished job records are kept this long (seconds) for polling
+JOB_RECORD_TTL = 24 * 60 * 60
+
+
+def artifact_key(report_type, format, filters, version):
+    """Cache key for an export: identical requests at one data version share a file."""
+    raw = json.dumps([report_type, format, sorted(filters.items()), version])
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def write_export(report_type, format, path, progress=None, filters=None):
+    """Render one export to path, writing to a temporary file first.
+
+    Filters (column projection, date range) apply to every format but PDF,
+    whose layout is fixed.
+    """
+    _, filename = REPORT_MODELS[report_type]
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    try:
+        with open(tmp_path, 'wb') as out:
+            if format == 'excel':
+                shutil.copyfileobj(write_excel(report_type, progress, filters), out)
+            elif format == 'pdf':
+                title = filename.replace('_', ' ').title()
+                shutil.copyfileobj(write_pdf(report_type, title, progress), out)
+            elif format in COLUMNAR_FORMATS:
+                shutil.copyfileobj(write_columnar(report_type, format, progress, filters), out)
+            else:
+                for chunk in iter_stream_export(report_type, format, progress, filters):
+                    out.write(chunk.encode('utf-8'))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class ReportJobQueue:
+    """Renders exports on a bounded thread pool into an on-disk artifact cache.
+
+    Job state lives in small JSON files next to the artifacts, so a poll
+    can be answered by any worker process, not only the one running it.
+    """
+
+    def __init__(self):
+        self.cache_dir = None
+        self.max_bytes = 0
+        self._executor = None
+        self._running = {}
+        self._lock = Lock()
+
+    def init_app(self, app):
+        self.cache_dir = app.config.get('REPORT_CACHE_DIR') or \
+            os.path.join(app.instance_path, 'report_cache')
+        self.max_bytes = app.config.get('REPORT_CACHE_MAX_BYTES', 500 * 1024 * 1024)
+        self._executor = ThreadPoolExecutor(
+            max_workers=app.config.get('REPORT_JOB_WORKERS', 2),
+            thread_name_prefix='report-job'
+        )
+        os.makedirs(os.path.join(self.cache_dir, 'jobs'), exist_ok=True)
+
+    def _job_path(self, job_id):
+        return os.path.join(self.cache_dir, 'jobs', f'{job_id}.json')
+
+    def artifact_path(self, key, format):
+        extension, _ = EXPORT_FILES[format]
+        return os.path.join(self.cache_dir, f'{key}.{extension}')
+
+    def _save(self, job):
+        tmp_path = f'{self._job_path(job["id"])}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(job, f)
+        os.replace(tmp_path, self._job_path(job['id']))
+
+    def get(self, job_id):
+        try:
+            with open(self._job_path(job_id)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def submit(self, app, report_type, format, filters=None):
+        """Queue an export, or return a finished job if the artifact is cached."""
+        filters = filters or {}
+        key = artifact_key(report_type, format, filters, current_data_version())
+        path = self.artifact_path(key, format)
+
+        job = {
+            'id': uuid.uuid4().hex,
+            'key': key,
+            'report_type': report_type,
+            'format': format,
+            'filters': filters,
+            'status': 'queued',
+            'progress': 0,
+            'total': None,
+            'error': None,
+            'created': time(),
+        }
+
+        if os.path.exists(path):
+            os.utime(path)  # mark as recently used for LRU eviction
+            job['status'] = 'done'
+            self._save(job)
+            return job
+
+        with self._lock:
+            running_id = self._running.get(key)
+            if running_id:
+                running = self.get(running_id)
+                if running and running['status'] in ('queued', 'running'):
+                    return running
+            self._running[key] = job['id']
+
+        self._save(job)
+        self._executor.submit(self._run, app, dict(job), path)
+        return job
+
+    def _run(self, app, job, path):
+        with app.app_context():
+            try:
+                job['status'] = 'running'
+                job['total'] = count_report_rows(job['report_type'], job['filters'])
+                self._save(job)
+
+                def progress(rows):
+                    job['progress'] += rows
+                    self._save(job)
+
+                write_export(job['report_type'], job['format'], path, progress, job['filters'])
+                job['status'] = 'done'
+            except Exception as e:
+                app.logger.error(f"Report job {job['id']} failed: {e}")
+                job['status'] = 'failed'
+                job['error'] = str(e)
+            finally:
+                self._save(job)
+                with self._lock:
+                    self._running.pop(job['key'], None)
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used artifacts over the size cap and stale job records."""
+        artifacts = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                artifacts.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in artifacts)
+        for _, size, path in sorted(artifacts):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+        cutoff = time() - JOB_RECORD_TTL
+        for entry in os.scandir(os.path.join(self.cache_dir, 'jobs')):
+            if entry.stat().st_mtime < cutoff:
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+
+
+report_jobs = ReportJobQueue()
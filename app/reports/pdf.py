@@ -0,0 +1,125 @@
+from tempfile import SpooledTemporaryFile
+
+from reportlab.platypus import SimpleDocTemplate, LongTable, TableStyle, Paragraph
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.lib import colors
+
+from app import db
+from app.models import Asset, Stationery, Checkout, Maintenance, User
+from app.reports.exports import stream_select, SPOOL_MAX_SIZE
+
+# Rows per LongTable. Splitting a table across pages re-measures the rows
+# left in it, so several moderate tables lay out far faster than one huge one.
+PDF_CHUNK_SIZE = 500
+
+TABLE_STYLE = TableStyle([('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+                          ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+                          ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+                          ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                          ('FONTSIZE', (0, 0), (-1, 0), 14),
+                          ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+                          ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+                          ('GRID', (0, 0), (-1, -1), 1, colors.black)])
+
+
+def _date(value, missing):
+    return value.strftime('%Y-%m-%d') if value else missing
+
+
+def _pdf_report(report_type):
+    """Header row, column widths (inches), select and row formatter for a report.
+
+    Related names are joined into the select so rendering a row never
+    triggers a lazy load.
+    """
+    if report_type == 'assets':
+        return (
+            ['ID', 'Name', 'Type', 'Location', 'Status'],
+            [0.6, 1.9, 1.2, 1.5, 1.3],
+            db.select(Asset.id, Asset.name, Asset.asset_type, Asset.location, Asset.status)
+            .order_by(Asset.id),
+            lambda row: list(row)
+        )
+    if report_type == 'stationery':
+        return (
+            ['ID', 'Item Type', 'Quantity', 'Unit', 'Location'],
+            [0.6, 1.7, 1.1, 1.1, 2.0],
+            db.select(Stationery.id, Stationery.item_type, Stationery.quantity,
+                      Stationery.unit, Stationery.location)
+            .order_by(Stationery.id),
+            lambda row: [row.id, row.item_type, row.quantity, row.unit, row.location or 'N/A']
+        )
+    if report_type == 'checkouts':
+        return (
+            ['ID', 'Asset', 'User', 'Checkout Date', 'Return Date'],
+            [0.6, 1.8, 1.3, 1.4, 1.4],
+            db.select(Checkout.id, Asset.name, User.username,
+                      Checkout.checkout_date, Checkout.actual_return)
+            .outerjoin(Asset, Checkout.asset_id == Asset.id)
+            .outerjoin(User, Checkout.user_id == User.id)
+            .order_by(Checkout.id),
+            lambda row: [row.id, row.name, row.username,
+                         _date(row.checkout_date, ''),
+                         _date(row.actual_return, 'Not returned')]
+        )
+    if report_type == 'maintenance':
+        return (
+            ['ID', 'Asset', 'Start Date', 'End Date', 'Status', 'Cost'],
+            [0.6, 1.6, 1.1, 1.1, 1.2, 0.9],
+            db.select(Maintenance.id, Asset.name, Maintenance.start_date,
+                      Maintenance.end_date, Maintenance.status, Maintenance.cost)
+            .outerjoin(Asset, Maintenance.asset_id == Asset.id)
+            .order_by(Maintenance.id),
+            lambda row: [row.id, row.name,
+                         _date(row.start_date, ''),
+                         _date(row.end_date, 'Ongoing'),
+                         row.status,
+                         f"${row.cost:.2f}" if row.cost else 'N/A']
+        )
+    raise KeyError(report_type)
+
+
+class _LazyStory(list):
+    """Flowable list that refills itself from a generator when it runs dry.
+
+    SimpleDocTemplate.build consumes its story from the front, so only the
+    chunk currently being laid out is held in memory.
+    """
+
+    def __init__(self, flowables, chunks):
+        super().__init__(flowables)
+        self._chunks = iter(chunks)
+
+    def __len__(self):
+        if not list.__len__(self):
+            self.extend(next(self._chunks, ()))
+        return list.__len__(self)
+
+
+def _table_chunks(report_type, progress=None):
+    headers, widths, stmt, format_row = _pdf_report(report_type)
+    col_widths = [width * inch for width in widths]
+    empty = True
+    for batch in stream_select(stmt, PDF_CHUNK_SIZE, progress):
+        empty = False
+        table = LongTable([headers] + [format_row(row) for row in batch],
+                          colWidths=col_widths, repeatRows=1)
+        table.setStyle(TABLE_STYLE)
+        yield [table]
+    if empty:
+        table = LongTable([headers], colWidths=col_widths, repeatRows=1)
+        table.setStyle(TABLE_STYLE)
+        yield [table]
+
+
+def write_pdf(report_type, title, progress=None):
+    """Render a report PDF into a spooled file, one table chunk at a time."""
+    output = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    doc = SimpleDocTemplate(output, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = _LazyStory([Paragraph(title, styles['Title'])], _table_chunks(report_type, progress))
+    doc.build(story)
+    output.seek(0)
+    return output
@@ -0,0 +1,111 @@
+from tempfile import SpooledTemporaryFile
+
+import numpy as np
+from openpyxl import Workbook
+
+from app import db
+from app.models import Asset
+from app.cache import dashboard_cache, current_data_version
+from app.reports.exports import SPOOL_MAX_SIZE
+
+# Label used for assets with no location / status
+UNSPECIFIED = 'Unspecified'
+
+
+class AssetCube:
+    """Dense location x asset_type x status count cube for the assets report.
+
+    Built from one GROUP BY and cached per data version; slicing works on
+    the cached array, so filtered views and the Excel summary never go back
+    to the database.
+    """
+
+    def __init__(self, locations, asset_types, statuses, counts):
+        self.locations = locations
+        self.asset_types = asset_types
+        self.statuses = statuses
+        self.counts = counts
+
+    @classmethod
+    def cached(cls):
+        return dashboard_cache.get_or_set('asset_cube', current_data_version(), cls.build)
+
+    @classmethod
+    def build(cls):
+        rows = db.session.query(
+            Asset.location,
+            Asset.asset_type,
+            Asset.status,
+            db.func.count(Asset.id)
+        ).group_by(Asset.location, Asset.asset_type, Asset.status).all()
+
+        rows = [(location or UNSPECIFIED, asset_type, status or UNSPECIFIED, count)
+                for location, asset_type, status, count in rows]
+        locations = sorted({row[0] for row in rows})
+        asset_types = sorted({row[1] for row in rows})
+        statuses = sorted({row[2] for row in rows})
+
+        counts = np.zeros((len(locations), len(asset_types), len(statuses)), dtype=np.int64)
+        if rows:
+            l_index = {value: i for i, value in enumerate(locations)}
+            t_index = {value: i for i, value in enumerate(asset_types)}
+            s_index = {value: i for i, value in enumerate(statuses)}
+            # Merged labels (None and 'Unspecified') add into the same cell
+            np.add.at(counts,
+                      ([l_index[r[0]] for r in rows], [t_index[r[1]] for r in rows],
+                       [s_index[r[2]] for r in rows]),
+                      [r[3] for r in rows])
+        return cls(locations, asset_types, statuses, counts)
+
+    def slice(self, locations=None, statuses=None):
+        """Cube restricted to the given locations and/or statuses.
+
+        Unknown labels are ignored; an empty selection means no restriction.
+        """
+        l_keep = [i for i, value in enumerate(self.locations) if not locations or value in locations]
+        s_keep = [i for i, value in enumerate(self.statuses) if not statuses or value in statuses]
+        return AssetCube(
+            [self.locations[i] for i in l_keep],
+            self.asset_types,
+            [self.statuses[i] for i in s_keep],
+            self.counts[np.ix_(l_keep, range(len(self.asset_types)), s_keep)]
+        )
+
+    @property
+    def total(self):
+        return int(self.counts.sum())
+
+    def location_type(self):
+        """Location x type matrix as lists, with row and column totals."""
+        matrix = self.counts.sum(axis=2)
+        return {
+            'rows': [(location, matrix[i].tolist(), int(matrix[i].sum()))
+                     for i, location in enumerate(self.locations)],
+            'column_totals': matrix.sum(axis=0).tolist(),
+        }
+
+    def status_totals(self):
+        """(status, count) pairs across the whole (sliced) cube."""
+        return list(zip(self.statuses, self.counts.sum(axis=(0, 1)).tolist()))
+
+
+def write_pivot_excel(cube):
+    """Write the cube's location x type matrix and status totals to a spooled .xlsx."""
+    workbook = Workbook(write_only=True)
+
+    sheet = workbook.create_sheet('Location x Type')
+    matrix = cube.location_type()
+    sheet.append(['Location'] + cube.asset_types + ['Total'])
+    for location, counts, total in matrix['rows']:
+        sheet.append([location] + counts + [total])
+    sheet.append(['Total'] + matrix['column_totals'] + [cube.total])
+
+    sheet = workbook.create_sheet('Status')
+    sheet.append(['Status', 'Count'])
+    for status, count in cube.status_totals():
+        sheet.append([status, count])
+
+    output = SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    workbook.save(output)
+    output.seek(0)
+    return output
@@ -1,15 +1,27 @@
-from flask import render_template, request, send_file, flash, redirect, url_for
+from flask import (
+    render_template, request, send_file, flash, redirect, url_for, Response,
+    stream_with_context, jsonify, abort, current_app
+)
 from flask_login import login_required
-from io import BytesIO
 from datetime import datetime, timedelta
+import os
+from sqlalchemy.orm import joinedload
 from app import db
-from app.models import Asset, Stationery, Checkout, Maintenance
+from app.models import (
+    Asset, Stationery, Checkout, Maintenance, User,
+    DailyAssetRollup, DailyStationeryRollup, DailyActivityRollup
+)
 from app.reports import bp
-import pandas as pd
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
+from app.reports.exports import (
+    write_excel, write_columnar, iter_stream_export, parse_export_filters,
+    REPORT_MODELS, XLSX_MIMETYPE, STREAM_FORMATS, COLUMNAR_FORMATS
+)
+from app.reports.pdf import write_pdf
+from app.reports.pivot import AssetCube, write_pivot_excel
+from app.reports.sql import period_bucket, duration_days
+from app.reports.jobs import report_jobs, EXPORT_FILES
+from app.reports.utilization import UtilizationReport, utilization_window
+from app.rollups import trend_start
 
 @bp.route('/')
 @login_required
@@ -19,20 +31,28 @@ def reports_dashboard():
 @bp.route('/assets')
 @login_required
 def assets_report():
-    assets = db.session.query(
-        Asset.location,
-        Asset.asset_type,
-        db.func.count(Asset.id).label('count')
-    ).group_by(Asset.location, Asset.asset_type).all()
-    
-    status_counts = db.session.query(
-        Asset.status,
-        db.func.count(Asset.id).label('count')
-    ).group_by(Asset.status).all()
-    
+    cube = AssetCube.cached()
+    locations = request.args.getlist('location')
+    statuses = request.args.getlist('status')
+    sliced = cube.slice(locations, statuses)
     return render_template('reports/assets_report.html',
-                         assets=assets,
-                         status_counts=status_counts)
+                         cube=sliced,
+                         matrix=sliced.location_type(),
+                         status_counts=sliced.status_totals(),
+                         all_locations=cube.locations,
+                         all_statuses=cube.statuses,
+                         selected_locations=locations,
+                         selected_statuses=statuses)
+
+@bp.route('/assets/summary.xlsx')
+@login_required
+def assets_summary_export():
+    cube = AssetCube.cached().slice(request.args.getlist('location'),
+                                    request.args.getlist('status'))
+    return send_file(write_pivot_excel(cube),
+                    mimetype=XLSX_MIMETYPE,
+                    as_attachment=True,
+                    download_name='assets_summary.xlsx')
 
 @bp.route('/stationery')
 @login_required
@@ -45,119 +65,330 @@ def stationery_report():
 @login_required
 def checkouts_report():
     time_period = request.args.get('period', 'month', type=str)
+    page = request.args.get('page', 1, type=int)
+    per_page = min(request.args.get('size', current_app.config.get('ITEMS_PER_PAGE', 20), type=int), 200)
     
     if time_period == 'week':
-        days = 7
+        days, bucket_unit = 7, 'day'
     elif time_period == 'month':
-        days = 30
+        days, bucket_unit = 30, 'day'
     else:  # year
-        days = 365
+        days, bucket_unit = 365, 'month'
     
     start_date = datetime.utcnow() - timedelta(days=days)
+    in_period = Checkout.checkout_date >= start_date
+    
+    checkouts = Checkout.query.filter(in_period)\
+        .options(
+            joinedload(Checkout.asset).load_only(Asset.name),
+            joinedload(Checkout.user).load_only(User.username)
+        )\
+        .order_by(Checkout.checkout_date.desc(), Checkout.id.desc())\
+        .paginate(page=page, per_page=per_page, error_out=False)
     
-    checkouts = Checkout.query.filter(
-        Checkout.checkout_date >= start_date
-    ).order_by(Checkout.checkout_date.desc()).all()
+    # Totals per day (or month for the yearly view) plus a grand total row
+    bucket = period_bucket(Checkout.checkout_date, bucket_unit).label('bucket')
+    overdue = db.case(
+        (Checkout.expected_return < db.func.coalesce(Checkout.actual_return, datetime.utcnow()), 1),
+        else_=0
+    )
+    returned_days = duration_days(Checkout.checkout_date, Checkout.actual_return)
+    summary_columns = (
+        db.func.count(Checkout.id).label('count'),
+        db.func.sum(overdue).label('overdue'),
+        db.func.avg(returned_days).label('avg_days'),
+    )
+    periods = db.session.query(bucket, *summary_columns)\
+        .filter(in_period).group_by(bucket).order_by(bucket.desc()).all()
+    totals = db.session.query(*summary_columns).filter(in_period).one()
     
     return render_template('reports/checkouts_report.html',
                          checkouts=checkouts,
-                         period=time_period)
+                         periods=periods,
+                         totals=totals,
+                         period=time_period,
+                         size=per_page)
+
+def _maintenance_totals():
+    """count / total_cost / avg_days columns shared by the maintenance summaries."""
+    return (
+        db.func.count(Maintenance.id).label('count'),
+        db.func.coalesce(db.func.sum(Maintenance.cost), 0).label('total_cost'),
+        db.func.avg(duration_days(Maintenance.start_date, Maintenance.end_date)).label('avg_days'),
+    )
 
 @bp.route('/maintenance')
 @login_required
 def maintenance_report():
-    maintenance = Maintenance.query.order_by(Maintenance.start_date.desc()).all()
-    total_cost = sum(m.cost for m in maintenance if m.cost)
+    totals = db.session.query(*_maintenance_totals()).one()
+    
+    month = period_bucket(Maintenance.start_date, 'month').label('month')
+    by_month = db.session.query(month, *_maintenance_totals())\
+        .group_by(month).order_by(month.desc()).all()
+    
+    by_type = db.session.query(Asset.asset_type, *_maintenance_totals())\
+        .outerjoin(Asset, Maintenance.asset_id == Asset.id)\
+        .group_by(Asset.asset_type).order_by(Asset.asset_type).all()
+    
+    technician = db.func.nullif(Maintenance.technician, '').label('technician')
+    by_technician = db.session.query(technician, *_maintenance_totals())\
+        .group_by(technician).order_by(technician).all()
+    
     return render_template('reports/maintenance_report.html',
-                         maintenance=maintenance,
-                         total_cost=total_cost)
+                         totals=totals,
+                         total_cost=totals.total_cost,
+                         by_month=by_month,
+                         by_type=by_type,
+                         by_technician=by_technician)
+
+@bp.route('/maintenance/records')
+@login_required
+def maintenance_records():
+    """Paginated drill-down into one maintenance report group."""
+    page = request.args.get('page', 1, type=int)
+    month = request.args.get('month', type=str)
+    asset_type = request.args.get('asset_type', type=str)
+    technician = request.args.get('technician', type=str)  # '' selects unassigned
+    
+    query = Maintenance.query.options(joinedload(Maintenance.asset))
+    if month:
+        try:
+            month_start = datetime.strptime(month, '%Y-%m')
+        except ValueError:
+            flash('Invalid month', 'danger')
+            return redirect(url_for('reports.maintenance_report'))
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        query = query.filter(Maintenance.start_date >= month_start,
+                             Maintenance.start_date < next_month)
+    if asset_type is not None:
+        query = query.join(Asset, Maintenance.asset_id == Asset.id)\
+            .filter(Asset.asset_type == asset_type)
+    if technician:
+        query = query.filter(Maintenance.technician == technician)
+    elif technician is not None:
+        query = query.filter(db.or_(Maintenance.technician.is_(None), Maintenance.technician == ''))
+    
+    records = query.order_by(Maintenance.start_date.desc(), Maintenance.id.desc())\
+        .paginate(page=page, per_page=current_app.config.get('ITEMS_PER_PAGE', 20), error_out=False)
+    
+    filters = {key: value for key, value in
+               (('month', month), ('asset_type', asset_type), ('technician', technician))
+               if value is not None}
+    return render_template('reports/maintenance_records.html',
+                         records=records,
+                         filters=filters)
+
+@bp.route('/utilization')
+@login_required
+def utilization_report():
+    try:
+        start, end = utilization_window(request.args)
+    except ValueError as e:
+        flash(f'Invalid date range: {e}', 'danger')
+        return redirect(url_for('reports.utilization_report'))
+    report = UtilizationReport(start, end)
+    return render_template('reports/utilization_report.html',
+                         start=start,
+                         end=end - timedelta(days=1),
+                         overall=report.overall(),
+                         by_type=report.by_type(),
+                         by_location_type=report.by_location_type(),
+                         by_asset=report.by_asset()[:50])
 
-# Export route for Excel and PDF (already present)
+@bp.route('/utilization/data')
+@login_required
+def utilization_data():
+    try:
+        start, end = utilization_window(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    report = UtilizationReport(start, end)
+    return jsonify({
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'overall': report.overall(),
+        'by_type': [{'asset_type': asset_type, 'assets': count, 'utilization': ratio}
+                    for asset_type, count, ratio in report.by_type()],
+        'by_location_type': [{'location': location, 'asset_type': asset_type,
+                              'assets': count, 'utilization': ratio}
+                             for (location, asset_type), count, ratio in report.by_location_type()],
+        'by_asset': [{'id': asset.id, 'name': asset.name, 'asset_type': asset.asset_type,
+                      'location': asset.location, 'utilization': ratio}
+                     for asset, ratio in report.by_asset()],
+    })
+
+# Export route for Excel, PDF, streamed CSV / NDJSON and Parquet / Arrow
 @bp.route('/export/<report_type>/<format>')
 @login_required
 def export_report(report_type, format):
-    if report_type == 'assets':
-        query = Asset.query
-        filename = 'assets_report'
-    elif report_type == 'stationery':
-        query = Stationery.query
-        filename = 'stationery_report'
-    elif report_type == 'checkouts':
-        query = Checkout.query
-        filename = 'checkouts_report'
-    elif report_type == 'maintenance':
-        query = Maintenance.query
-        filename = 'maintenance_report'
-    else:
+    if report_type not in REPORT_MODELS:
         flash('Invalid report type', 'danger')
         return redirect(url_for('reports.reports_dashboard'))
+    _, filename = REPORT_MODELS[report_type]
+    
+    # ?columns=a,b&start=YYYY-MM-DD&end=YYYY-MM-DD (not applied to PDF)
+    try:
+        filters = parse_export_filters(report_type, request.args)
+    except ValueError as e:
+        flash(f'Invalid export filter: {e}', 'danger')
+        return redirect(url_for('reports.reports_dashboard'))
     
     if format == 'excel':
-        df = pd.read_sql(query.statement, db.engine)
-        output = BytesIO()
-        
-        # Using the 'with' statement to handle ExcelWriter
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Report')
-        
-        output.seek(0)  # Rewind the output stream before sending it
-        return send_file(output, 
-                        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        output = write_excel(report_type, filters=filters)
+        return send_file(output,
+                        mimetype=XLSX_MIMETYPE,
                         as_attachment=True,
                         download_name=f'{filename}.xlsx')
     
+    elif format in STREAM_FORMATS:
+        extension, mimetype = STREAM_FORMATS[format]
+        return Response(stream_with_context(iter_stream_export(report_type, format, filters=filters)),
+                        mimetype=mimetype,
+                        headers={'Content-Disposition': f'attachment; filename={filename}.{extension}'})
+    
+    elif format in COLUMNAR_FORMATS:
+        extension, mimetype = COLUMNAR_FORMATS[format]
+        output = write_columnar(report_type, format, filters=filters)
+        return send_file(output,
+                        mimetype=mimetype,
+                        as_attachment=True,
+                        download_name=f'{filename}.{extension}')
+    
     elif format == 'pdf':
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=letter)
-        elements = []
-        
-        styles = getSampleStyleSheet()
-        elements.append(Paragraph(f"{filename.replace('_', ' ').title()}", styles['Title']))
-        
-        data = []
-        if report_type == 'assets':
-            data.append(['ID', 'Name', 'Type', 'Location', 'Status'])
-            for asset in query:
-                data.append([asset.id, asset.name, asset.asset_type, asset.location, asset.status])
-        elif report_type == 'stationery':
-            data.append(['ID', 'Item Type', 'Quantity', 'Unit', 'Location'])
-            for item in query:
-                data.append([item.id, item.item_type, item.quantity, item.unit, item.location or 'N/A'])
-        elif report_type == 'checkouts':
-            data.append(['ID', 'Asset', 'User', 'Checkout Date', 'Return Date'])
-            for checkout in query:
-                data.append([checkout.id,
-                             checkout.asset.name,
-                             checkout.user.username,
-                             checkout.checkout_date.strftime('%Y-%m-%d'),
-                             checkout.actual_return.strftime('%Y-%m-%d') if checkout.actual_return else 'Not returned'])
-        elif report_type == 'maintenance':
-            data.append(['ID', 'Asset', 'Start Date', 'End Date', 'Status', 'Cost'])
-            for maint in query:
-                data.append([maint.id,
-                             maint.asset.name,
-                             maint.start_date.strftime('%Y-%m-%d'),
-                             maint.end_date.strftime('%Y-%m-%d') if maint.end_date else 'Ongoing',
-                             maint.status,
-                             f"${maint.cost:.2f}" if maint.cost else 'N/A'])
-        
-        table = Table(data)
-        table.setStyle(TableStyle([('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                                   ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                                   ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                                   ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                                   ('FONTSIZE', (0, 0), (-1, 0), 14),
-                                   ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                                   ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                                   ('GRID', (0, 0), (-1, -1), 1, colors.black)]))
-        elements.append(table)
-        
-        doc.build(elements)
-        buffer.seek(0)
-        return send_file(buffer, 
+        output = write_pdf(report_type, filename.replace('_', ' ').title())
+        return send_file(output,
                         mimetype='application/pdf',
                         as_attachment=True,
                         download_name=f'{filename}.pdf')
     
     flash('Invalid export format', 'danger')
     return redirect(url_for('reports.reports_dashboard'))
+
+# ----------------------------
+# Background Report Jobs
+# ----------------------------
+
+def _job_json(job):
+    data = {
+        'id': job['id'],
+        'report_type': job['report_type'],
+        'format': job['format'],
+        'status': job['status'],
+        'progress': job['progress'],
+        'total': job['total'],
+        'status_url': url_for('reports.report_job_status', job_id=job['id']),
+    }
+    if job['status'] == 'done':
+        data['download_url'] = url_for('reports.download_report_job', job_id=job['id'])
+    if job['error']:
+        data['error'] = job['error']
+    return data
+
+@bp.route('/jobs/<report_type>/<format>', methods=['POST'])
+@login_required
+def submit_report_job(report_type, format):
+    if report_type not in REPORT_MODELS or format not in EXPORT_FILES:
+        return jsonify({'error': 'Invalid report type or format'}), 400
+    try:
+        filters = parse_export_filters(report_type, request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    job = report_jobs.submit(current_app._get_current_object(), report_type, format, filters)
+    response = jsonify(_job_json(job))
+    response.status_code = 202
+    response.headers['Location'] = url_for('reports.report_job_status', job_id=job['id'])
+    return response
+
+@bp.route('/jobs/<job_id>')
+@login_required
+def report_job_status(job_id):
+    job = report_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(_job_json(job))
+
+@bp.route('/jobs/<job_id>/download')
+@login_required
+def download_report_job(job_id):
+    job = report_jobs.get(job_id)
+    if job is None or job['status'] != 'done':
+        abort(404)
+    path = report_jobs.artifact_path(job['key'], job['format'])
+    if not os.path.exists(path):
+        # Evicted since the job finished; the client should resubmit
+        abort(410)
+    os.utime(path)  # mark as recently used for LRU eviction
+    _, filename = REPORT_MODELS[job['report_type']]
+    extension, mimetype = EXPORT_FILES[job['format']]
+    return send_file(path, mimetype=mimetype, as_attachment=True,
+                     download_name=f'{filename}.{extension}')
+
+
+# Trend endpoints read only the daily rollup tables, never the live ones.
+TREND_MAX_DAYS = 730
+ASSET_TREND_GROUPS = {
+    'status': DailyAssetRollup.status,
+    'asset_type': DailyAssetRollup.asset_type,
+    'location': DailyAssetRollup.location,
+}
+
+def _trend_days():
+    days = request.args.get('days', 90, type=int)
+    return max(1, min(days, TREND_MAX_DAYS))
+
+def _series(rows):
+    """Fold (date, key, value) rows into {'dates': [...], 'series': {key: [...]}}.
+
+    Days without a row for a key read as 0, so every series lines up with dates.
+    """
+    dates = sorted({row[0] for row in rows})
+    index = {day: i for i, day in enumerate(dates)}
+    series = {}
+    for day, key, value in rows:
+        series.setdefault(key or 'Unspecified', [0] * len(dates))[index[day]] += value
+    return {'dates': [day.isoformat() for day in dates], 'series': series}
+
+@bp.route('/trends/assets')
+@login_required
+def asset_trends():
+    group = request.args.get('group', 'status')
+    if group not in ASSET_TREND_GROUPS:
+        return jsonify({'error': f"group must be one of {', '.join(ASSET_TREND_GROUPS)}"}), 400
+    column = ASSET_TREND_GROUPS[group]
+    rows = db.session.query(
+        DailyAssetRollup.snapshot_date,
+        column,
+        db.func.sum(DailyAssetRollup.count)
+    ).filter(DailyAssetRollup.snapshot_date >= trend_start(_trend_days()))\
+     .group_by(DailyAssetRollup.snapshot_date, column)\
+     .order_by(DailyAssetRollup.snapshot_date).all()
+    return jsonify({'group': group, **_series(rows)})
+
+@bp.route('/trends/stationery')
+@login_required
+def stationery_trends():
+    query = db.session.query(
+        DailyStationeryRollup.snapshot_date,
+        DailyStationeryRollup.item_type,
+        db.func.sum(DailyStationeryRollup.quantity)
+    ).filter(DailyStationeryRollup.snapshot_date >= trend_start(_trend_days()))
+    item_type = request.args.get('item_type')
+    if item_type:
+        query = query.filter(DailyStationeryRollup.item_type == item_type)
+    rows = query.group_by(DailyStationeryRollup.snapshot_date, DailyStationeryRollup.item_type)\
+        .order_by(DailyStationeryRollup.snapshot_date).all()
+    return jsonify(_series(rows))
+
+@bp.route('/trends/activity')
+@login_required
+def activity_trends():
+    rows = DailyActivityRollup.query\
+        .filter(DailyActivityRollup.snapshot_date >= trend_start(_trend_days()))\
+        .order_by(DailyActivityRollup.snapshot_date).all()
+    return jsonify({
+        'dates': [row.snapshot_date.isoformat() for row in rows],
+        'series': {
+            'open_checkouts': [row.open_checkouts for row in rows],
+            'open_maintenance': [row.open_maintenance for row in rows],
+        },
+    })
@@ -0,0 +1,23 @@
+from app import db
+
+# Bucket formats per dialect for period_bucket()
+_SQLITE_FORMATS = {'day': '%Y-%m-%d', 'month': '%Y-%m', 'year': '%Y'}
+_POSTGRES_FORMATS = {'day': 'YYYY-MM-DD', 'month': 'YYYY-MM', 'year': 'YYYY'}
+
+
+def _dialect():
+    return db.session.get_bind().dialect.name
+
+
+def period_bucket(column, unit):
+    """SQL expression labelling a datetime by day, month or year, e.g. '2025-07'."""
+    if _dialect() == 'postgresql':
+        return db.func.to_char(column, _POSTGRES_FORMATS[unit])
+    return db.func.strftime(_SQLITE_FORMATS[unit], column)
+
+
+def duration_days(start, end):
+    """SQL expression for the (fractional) days between two datetimes."""
+    if _dialect() == 'postgresql':
+        return db.func.extract('epoch', end - start) / 86400.0
+    return db.func.julianday(end) - db.func.julianday(start)
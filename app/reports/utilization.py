@@ -0,0 +1,157 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app import db
+from app.models import Asset, Checkout
+
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def _epoch_seconds(value):
+    """Naive (UTC) datetime -> whole seconds since the epoch."""
+    return int((value - EPOCH).total_seconds())
+
+
+def _epoch_column(column):
+    """SQL expression for a naive (UTC) DateTime column as whole epoch seconds.
+
+    Converting in the database saves boxing a Python datetime per row.
+    """
+    if db.session.get_bind().dialect.name == 'postgresql':
+        return db.cast(db.func.floor(db.extract('epoch', column)), db.BigInteger)
+    # SQLite rounds fractions to milliseconds, so cut them off to truncate
+    return db.cast(db.func.strftime('%s', db.func.substr(column, 1, 19)), db.Integer)
+
+
+def _int_columns(rows, width):
+    """Rows of width ints -> an (n, width) int64 array, built with np.fromiter."""
+    values = np.fromiter((value for row in rows for value in row),
+                         dtype=np.int64, count=len(rows) * width)
+    return values.reshape(len(rows), width)
+
+
+def busy_seconds(asset_index, starts, ends, n_assets):
+    """Seconds each asset spent checked out, counting overlapping records once.
+
+    Rows must be sorted by (asset_index, start) and already clipped to the
+    window, as seconds from its start. Each row contributes only the part of
+    its interval past the furthest end seen so far for the same asset.
+    Offsetting every asset's ends by asset_index * (largest end + 1) lets one
+    np.maximum.accumulate track that running end for all assets at once,
+    since an asset's offset ends are always above any earlier asset's.
+    """
+    if not len(starts):
+        return np.zeros(n_assets, dtype=np.int64)
+
+    stride = int(max(ends.max(), 0)) + 1
+    offset = asset_index.astype(np.int64) * stride
+    running_end = np.maximum.accumulate(ends + offset) - offset
+
+    # Furthest end among the asset's earlier rows (0 for its first row)
+    covered = np.empty_like(running_end)
+    covered[0] = 0
+    covered[1:] = running_end[:-1]
+    first = np.ones(len(starts), dtype=bool)
+    first[1:] = asset_index[1:] != asset_index[:-1]
+    covered[first] = 0
+
+    contribution = np.clip(ends - np.maximum(starts, covered), 0, None)
+    return np.bincount(asset_index, weights=contribution, minlength=n_assets).astype(np.int64)
+
+
+class UtilizationReport:
+    """Share of a time window each asset, type and location/type spent checked out.
+
+    Checkout intervals are loaded as epoch seconds and reduced with NumPy;
+    open checkouts run to the end of the window (or now, if sooner).
+    """
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+        self.span = max(int((end - start).total_seconds()), 0)
+
+        assets = db.session.execute(
+            db.select(Asset.id, Asset.name, Asset.asset_type, Asset.location).order_by(Asset.id)
+        ).all()
+        self.assets = assets
+        asset_ids = np.fromiter((row.id for row in assets), dtype=np.int64, count=len(assets))
+
+        # Open checkouts run to the end of the window, or now if sooner
+        now = _epoch_seconds(min(end, datetime.utcnow()))
+        rows = db.session.execute(
+            db.select(Checkout.asset_id, _epoch_column(Checkout.checkout_date),
+                      db.func.coalesce(_epoch_column(Checkout.actual_return), now))
+            .where(Checkout.asset_id.isnot(None),
+                   Checkout.checkout_date < end,
+                   db.or_(Checkout.actual_return.is_(None), Checkout.actual_return > start))
+        ).all()
+
+        self.busy = np.zeros(len(assets), dtype=np.int64)
+        if rows and len(assets):
+            columns = _int_columns(rows, 3)
+            checkout_assets = columns[:, 0]
+            window_start = _epoch_seconds(start)
+            starts = columns[:, 1] - window_start
+            ends = columns[:, 2] - window_start
+
+            # Map asset ids to positions; drop checkouts of deleted assets
+            position = np.searchsorted(asset_ids, checkout_assets)
+            position = np.minimum(position, len(asset_ids) - 1)
+            known = asset_ids[position] == checkout_assets
+
+            starts = np.clip(starts[known], 0, self.span)
+            ends = np.clip(ends[known], 0, self.span)
+            position = position[known]
+
+            order = np.lexsort((starts, position))
+            self.busy = busy_seconds(position[order], starts[order], ends[order], len(assets))
+
+    def _ratio(self, busy, count):
+        capacity = count * self.span
+        return busy / capacity if capacity else 0.0
+
+    def by_asset(self):
+        """(asset row, utilization) pairs, busiest first."""
+        ratios = self.busy / self.span if self.span else np.zeros(len(self.assets))
+        order = np.argsort(-ratios, kind='stable')
+        return [(self.assets[i], float(ratios[i])) for i in order]
+
+    def _grouped(self, key):
+        groups = {}
+        for asset, busy in zip(self.assets, self.busy.tolist()):
+            entry = groups.setdefault(key(asset), [0, 0])
+            entry[0] += 1
+            entry[1] += busy
+        return sorted(
+            ((group, count, self._ratio(busy, count)) for group, (count, busy) in groups.items()),
+            key=lambda item: -item[2]
+        )
+
+    def by_type(self):
+        """(asset_type, asset count, utilization) rows, busiest first."""
+        return self._grouped(lambda asset: asset.asset_type)
+
+    def by_location_type(self):
+        """((location, asset_type), asset count, utilization) rows, busiest first."""
+        return self._grouped(lambda asset: (asset.location or 'Unspecified', asset.asset_type))
+
+    def overall(self):
+        return self._ratio(int(self.busy.sum()), len(self.assets))
+
+
+def utilization_window(args, default_days=30):
+    """Window from ?start=YYYY-MM-DD&end=YYYY-MM-DD; the end date is inclusive.
+
+    Raises ValueError on malformed dates or an empty window.
+    """
+    today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    end = args.get('end', '').strip()
+    end = datetime.strptime(end, '%Y-%m-%d') + timedelta(days=1) if end else today + timedelta(days=1)
+    start = args.get('start', '').strip()
+    start = datetime.strptime(start, '%Y-%m-%d') if start else end - timedelta(days=default_days)
+    if start >= end:
+        raise ValueError("start must be on or before end")
+    return start, end
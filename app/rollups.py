@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app import db
+from app.models import (
+    Asset, Stationery, Checkout, Maintenance,
+    DailyAssetRollup, DailyStationeryRollup, DailyActivityRollup
+)
+
+# Maintenance statuses that count as open work in the activity rollup
+OPEN_MAINTENANCE_STATUSES = ('Pending', 'In Progress')
+
+
+def take_daily_snapshot(snapshot_date=None):
+    """Write the rollup rows for one day, replacing any taken earlier that day.
+
+    Each table is filled with a single INSERT ... SELECT, so the snapshot
+    costs three grouped scans however large the history is.
+    """
+    snapshot_date = snapshot_date or datetime.utcnow().date()
+    day = db.literal(snapshot_date, db.Date)
+
+    for model in (DailyAssetRollup, DailyStationeryRollup, DailyActivityRollup):
+        model.query.filter_by(snapshot_date=snapshot_date).delete()
+
+    db.session.execute(
+        db.insert(DailyAssetRollup).from_select(
+            ['snapshot_date', 'location', 'asset_type', 'status', 'count'],
+            db.select(day, Asset.location, Asset.asset_type, Asset.status, db.func.count(Asset.id))
+            .group_by(Asset.location, Asset.asset_type, Asset.status)
+        )
+    )
+
+    db.session.execute(
+        db.insert(DailyStationeryRollup).from_select(
+            ['snapshot_date', 'stationery_id', 'item_type', 'location', 'quantity'],
+            db.select(day, Stationery.id, Stationery.item_type, Stationery.location, Stationery.quantity)
+        )
+    )
+
+    open_checkouts = db.select(db.func.count(Checkout.id))\
+        .where(Checkout.actual_return.is_(None)).scalar_subquery()
+    open_maintenance = db.select(db.func.count(Maintenance.id))\
+        .where(Maintenance.status.in_(OPEN_MAINTENANCE_STATUSES)).scalar_subquery()
+    db.session.execute(
+        db.insert(DailyActivityRollup).from_select(
+            ['snapshot_date', 'open_checkouts', 'open_maintenance'],
+            db.select(day, open_checkouts, open_maintenance)
+        )
+    )
+
+    db.session.commit()
+    return snapshot_date
+
+
+def run_daily_snapshot(app):
+    """APScheduler entry point: take today's snapshot inside an app context."""
+    with app.app_context():
+        try:
+            snapshot_date = take_daily_snapshot()
+            current_app.logger.info(f"Daily inventory snapshot written for {snapshot_date}.")
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Daily inventory snapshot failed: {e}")
+
+
+def trend_start(days):
+    """First snapshot date included in a trend covering the last `days` days."""
+    return datetime.utcnow().date() - timedelta(days=days - 1)
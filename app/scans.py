@@ -0,0 +1,163 @@
+from datetime import timedelta
+from threading import Lock
+from time import monotonic
+
+from flask import url_for
+
+from app import db
+from app.models import Asset
+
+# Most payloads one batch request may carry
+MAX_SCANS = 500
+
+# Re-read rows this far behind the newest timestamp seen, so a transaction
+# that stamped last_updated before an earlier one committed is not missed
+REFRESH_OVERLAP = timedelta(seconds=60)
+
+
+def parse_qr(text):
+    """Key/value lines of a QR payload ("Asset ID: 1\\nSerial: ..."), keys lower-cased."""
+    info = {}
+    for line in (text or '').split('\n'):
+        if ': ' in line:
+            key, value = line.split(': ', 1)
+            info[key.strip().lower()] = value.strip()
+    return info
+
+
+def scan_result(asset):
+    """What a scanner is told about a resolved asset."""
+    return {
+        'id': asset.id,
+        'name': asset.name,
+        'serial_number': asset.serial_number,
+        'type': asset.asset_type,
+        'location': asset.location,
+        'status': asset.status,
+        'qr_code': url_for('assets.asset_qr', asset_id=asset.id, format='png'),
+        'checkout_url': url_for('checkout.checkout_asset', asset_id=asset.id),
+        'maintenance_url': url_for('maintenance.add_maintenance', asset_id=asset.id),
+        'details_url': url_for('assets.asset_details', asset_id=asset.id)
+    }
+
+
+class SerialIndex:
+    """In-process serial number -> asset id map.
+
+    Filled with one full read, then kept current by reading only the rows
+    whose last_updated is newer than the last refresh, at most once every
+    refresh_interval seconds. Deleted assets are not noticed until their
+    serial is reused, so a hit is only a hint: callers confirm it against
+    the row they load anyway.
+    """
+
+    def __init__(self, refresh_interval=5):
+        self.refresh_interval = refresh_interval
+        self._ids = {}
+        self._serials = {}
+        self._watermark = None
+        self._checked = None
+        self._lock = Lock()
+
+    def refresh(self, force=False):
+        with self._lock:
+            now = monotonic()
+            if not force and self._checked is not None and \
+                    now - self._checked < self.refresh_interval:
+                return
+            stmt = db.select(Asset.id, Asset.serial_number, Asset.last_updated)
+            if self._watermark is not None:
+                stmt = stmt.where(Asset.last_updated >= self._watermark - REFRESH_OVERLAP)
+            for asset_id, serial, last_updated in db.session.execute(stmt):
+                old_serial = self._serials.get(asset_id)
+                if old_serial is not None and old_serial != serial:
+                    self._ids.pop(old_serial, None)
+                self._ids[serial] = asset_id
+                self._serials[asset_id] = serial
+                if self._watermark is None or last_updated > self._watermark:
+                    self._watermark = last_updated
+            self._checked = now
+
+    def get(self, serial):
+        self.refresh()
+        return self._ids.get(serial)
+
+    def forget(self, serial):
+        """Drop a serial found to be stale, until the next refresh brings it back."""
+        with self._lock:
+            asset_id = self._ids.pop(serial, None)
+            if asset_id is not None and self._serials.get(asset_id) == serial:
+                del self._serials[asset_id]
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+            self._serials.clear()
+            self._watermark = None
+            self._checked = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'serials': len(self._ids),
+                'watermark': self._watermark.isoformat() if self._watermark else None,
+                'refresh_interval': self.refresh_interval,
+            }
+
+
+serial_index = SerialIndex()
+
+
+def init_scans(app):
+    serial_index.refresh_interval = app.config.get('SCAN_SERIAL_REFRESH', 5)
+
+
+def resolve_scans(payloads):
+    """Resolve a batch of QR payloads to assets, in order.
+
+    A payload names its asset by "Asset ID", or failing that by "Serial",
+    which is turned into an id through the serial index. All ids are then
+    loaded with a single IN query; only serials the index did not know,
+    or knew wrongly, cost a second one. Returns one dict per payload:
+    scan_result() for a match, {'error': ...} otherwise.
+    """
+    wanted = []
+    for payload in payloads:
+        info = parse_qr(payload) if isinstance(payload, str) else {}
+        serial = info.get('serial') or None
+        try:
+            wanted.append(('id', int(info['asset id']), serial))
+        except (KeyError, ValueError):
+            if serial:
+                wanted.append(('serial', serial_index.get(serial), serial))
+            else:
+                wanted.append(('invalid', None, None))
+
+    ids = {asset_id for _, asset_id, _ in wanted if asset_id is not None}
+    assets = {asset.id: asset for asset in Asset.query.filter(Asset.id.in_(ids))} if ids else {}
+
+    # Serials that did not resolve through the index
+    unresolved = set()
+    for kind, asset_id, serial in wanted:
+        if kind != 'serial':
+            continue
+        asset = assets.get(asset_id)
+        if asset is None or asset.serial_number != serial:
+            if asset_id is not None:
+                serial_index.forget(serial)
+            unresolved.add(serial)
+    by_serial = {}
+    if unresolved:
+        by_serial = {
+            asset.serial_number: asset
+            for asset in Asset.query.filter(Asset.serial_number.in_(unresolved))
+        }
+
+    results = []
+    for kind, asset_id, serial in wanted:
+        if kind == 'invalid':
+            results.append({'error': 'Invalid QR data'})
+            continue
+        asset = by_serial.get(serial) if serial in unresolved else assets.get(asset_id)
+        results.append(scan_result(asset) if asset else {'error': 'Asset not found'})
+    return results
@@ -1,6 +1,7 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from flask import current_app
 from app.email import send_low_stock_summary_email
+from app.rollups import run_daily_snapshot
 
 scheduler = BackgroundScheduler()
 
@@ -8,5 +9,9 @@ def start_scheduler():
     # Schedule the low stock email alert to run every day at 9am (server time)
     scheduler.add_job(func=send_low_stock_summary_email, trigger='cron', hour=9, minute=0, id='low_stock_alert')
 
+    # Snapshot end-of-day inventory into the daily rollup tables just before UTC midnight
+    scheduler.add_job(func=run_daily_snapshot, args=[current_app._get_current_object()],
+                      trigger='cron', hour=23, minute=55, timezone='UTC', id='daily_snapshot')
+
     scheduler.start()
-    current_app.logger.info("APScheduler started with low stock alert job.")
+    current_app.logger.info("APScheduler started with low stock alert and daily snapshot jobs.")
@@ -0,0 +1,226 @@
+from threading import Lock
+from time import monotonic
+
+from flask import current_app
+from sqlalchemy import event, text, or_
+from sqlalchemy.exc import DBAPIError
+
+from app import db
+from app.models import Asset
+
+# Asset columns covered by search, in the order the ilike filter used to check them
+SEARCH_COLUMNS = ('name', 'serial_number', 'asset_type', 'location')
+
+# Trigram indexes cannot help with terms shorter than this
+MIN_INDEXED_TERM = 3
+
+# While a worker falls back to LIKE, how often it checks for the index again
+FALLBACK_RECHECK_SECONDS = 60
+
+
+class LikeSearch:
+    """Unindexed fallback: the original ilike('%term%') filter, ordered by name.
+
+    Each backend's search() returns the filtered query plus the keys to
+    order (and keyset-paginate) it by, best match first, and whether those
+    keys sort descending.
+    """
+
+    name = 'like'
+
+    def supported(self, connection):
+        return True
+
+    def create(self, connection):
+        pass
+
+    def rebuild(self, connection):
+        pass
+
+    def exists(self, connection):
+        return True
+
+    def search(self, query, term):
+        keyword = f"%{term}%"
+        query = query.filter(
+            or_(*(getattr(Asset, column).ilike(keyword) for column in SEARCH_COLUMNS))
+        )
+        return query, [Asset.name, Asset.id], False
+
+
+class SQLiteFTSSearch(LikeSearch):
+    """FTS5 external-content table with the trigram tokenizer.
+
+    The trigram tokenizer matches arbitrary substrings case-insensitively,
+    so results are the same as the ilike filter, ranked by bm25. Triggers
+    on the asset table keep the index in step with every write, including
+    bulk statements that skip ORM events.
+    """
+
+    name = 'sqlite-fts5'
+    TABLE = 'asset_search'
+
+    def supported(self, connection):
+        """Whether this SQLite build has FTS5 with the trigram tokenizer (3.34+)."""
+        try:
+            connection.execute(text(
+                "CREATE VIRTUAL TABLE temp.asset_search_probe USING fts5(x, tokenize='trigram')"))
+        except DBAPIError:
+            return False
+        connection.execute(text("DROP TABLE temp.asset_search_probe"))
+        return True
+
+    def create(self, connection):
+        columns = ', '.join(SEARCH_COLUMNS)
+        new_values = ', '.join(f'new.{column}' for column in SEARCH_COLUMNS)
+        old_values = ', '.join(f'old.{column}' for column in SEARCH_COLUMNS)
+        statements = [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.TABLE} USING fts5("
+            f"{columns}, content='asset', content_rowid='id', tokenize='trigram')",
+            f"CREATE TRIGGER IF NOT EXISTS {self.TABLE}_ai AFTER INSERT ON asset BEGIN "
+            f"INSERT INTO {self.TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {self.TABLE}_ad AFTER DELETE ON asset BEGIN "
+            f"INSERT INTO {self.TABLE}({self.TABLE}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old_values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {self.TABLE}_au AFTER UPDATE ON asset BEGIN "
+            f"INSERT INTO {self.TABLE}({self.TABLE}, rowid, {columns}) "
+            f"VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {self.TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+        ]
+        for statement in statements:
+            connection.execute(text(statement))
+
+    def rebuild(self, connection):
+        connection.execute(text(f"INSERT INTO {self.TABLE}({self.TABLE}) VALUES ('rebuild')"))
+
+    def exists(self, connection):
+        return connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': self.TABLE}
+        ).first() is not None
+
+    def search(self, query, term):
+        if len(term) < MIN_INDEXED_TERM:
+            return super().search(query, term)
+        # Quote the term as one FTS5 string so it is matched as a substring
+        phrase = '"' + term.replace('"', '""') + '"'
+        hits = db.select(
+            db.literal_column('rowid').label('id'),
+            db.literal_column('rank').label('rank')
+        ).select_from(db.table(self.TABLE))\
+         .where(text(f'{self.TABLE} MATCH :phrase').bindparams(phrase=phrase))\
+         .subquery()
+        return query.join(hits, hits.c.id == Asset.id), [hits.c.rank, Asset.id], False
+
+
+class PostgresTrigramSearch(LikeSearch):
+    """pg_trgm GIN expression index over the concatenated search columns.
+
+    ILIKE on exactly the indexed expression is answered from the index;
+    results are ranked by word similarity to the term. Postgres maintains
+    the index itself, so there is nothing to keep in sync.
+    """
+
+    name = 'postgres-trgm'
+    INDEX = 'ix_asset_search_trgm'
+
+    def supported(self, connection):
+        return connection.execute(
+            text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        ).first() is not None
+
+    @staticmethod
+    def document(prefix=''):
+        """The indexed expression; queries must use exactly this to hit the index."""
+        parts = [f"coalesce({prefix}{column}, '')" for column in SEARCH_COLUMNS]
+        return "(" + " || ' ' || ".join(parts) + ")"
+
+    def create(self, connection):
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {self.INDEX} ON asset USING gin ({self.document()} gin_trgm_ops)"
+        ))
+
+    def rebuild(self, connection):
+        connection.execute(text(f"REINDEX INDEX {self.INDEX}"))
+
+    def exists(self, connection):
+        return connection.execute(
+            text("SELECT 1 FROM pg_indexes WHERE indexname = :name"), {'name': self.INDEX}
+        ).first() is not None
+
+    def search(self, query, term):
+        if len(term) < MIN_INDEXED_TERM:
+            return super().search(query, term)
+        document = db.literal_column(self.document('asset.'))
+        keyword = '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        query = query.filter(document.ilike(keyword, escape='\\'))
+        return query, [db.func.word_similarity(term, document), Asset.id], True
+
+
+BACKENDS = {
+    'sqlite': SQLiteFTSSearch,
+    'postgresql': PostgresTrigramSearch,
+}
+
+
+def backend_for(connection):
+    """The indexed backend for this database, or LIKE if it lacks the features."""
+    backend = BACKENDS.get(connection.dialect.name, LikeSearch)()
+    if not backend.supported(connection):
+        current_app.logger.warning(f"{backend.name} search is not available, using LIKE.")
+        return LikeSearch()
+    return backend
+
+
+_backend = None
+_backend_checked = 0.0
+_backend_lock = Lock()
+
+
+def asset_search():
+    """Search backend for this database, falling back to LIKE until its index exists.
+
+    An indexed backend is kept for the life of the process; the LIKE fallback
+    is re-checked every FALLBACK_RECHECK_SECONDS, so workers pick up an index
+    built by 'flask search rebuild' without a restart.
+    """
+    global _backend, _backend_checked
+    backend = _backend
+    if backend is not None and (type(backend) is not LikeSearch
+                                or monotonic() - _backend_checked < FALLBACK_RECHECK_SECONDS):
+        return backend
+    with _backend_lock:
+        with db.engine.connect() as connection:
+            backend = backend_for(connection)
+            if not backend.exists(connection):
+                current_app.logger.warning(
+                    "Asset search index missing, using LIKE; run 'flask search rebuild'.")
+                backend = LikeSearch()
+        _backend, _backend_checked = backend, monotonic()
+    return backend
+
+
+def search_assets(query, term):
+    """Filter an Asset query by a search term.
+
+    Returns (query, keys, descending): order by keys to rank best matches first.
+    """
+    return asset_search().search(query, term.strip())
+
+
+def rebuild_search_index():
+    """Create the search index if needed and rebuild it from the asset table."""
+    global _backend
+    with db.engine.begin() as connection:
+        backend = backend_for(connection)
+        backend.create(connection)
+        backend.rebuild(connection)
+    _backend = None
+    return backend
+
+
+# Tables made by create_all (tests, fresh installs) get the index straight away
+@event.listens_for(Asset.__table__, 'after_create')
+def create_search_index(target, connection, **kw):
+    backend_for(connection).create(connection)
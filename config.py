@@ -37,6 +37,37 @@ class Config:
     # Pagination
     ITEMS_PER_PAGE = 20
 
+    # Dashboard snapshot cache (per worker process)
+    DASHBOARD_CACHE_SIZE = int(os.environ.get('DASHBOARD_CACHE_SIZE', 64))
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 300))
+
+    # Live dashboard events (SSE): per-client queue size and keep-alive seconds
+    SSE_QUEUE_SIZE = int(os.environ.get('SSE_QUEUE_SIZE', 100))
+    SSE_HEARTBEAT = int(os.environ.get('SSE_HEARTBEAT', 15))
+    # Each open stream holds a server thread: cap them below the gunicorn
+    # thread count, close each after a while, and tell refused clients to poll
+    SSE_MAX_SUBSCRIBERS = int(os.environ.get('SSE_MAX_SUBSCRIBERS', 4))
+    SSE_MAX_STREAM_AGE = int(os.environ.get('SSE_MAX_STREAM_AGE', 300))
+    SSE_BUSY_RETRY = int(os.environ.get('SSE_BUSY_RETRY', 30))
+    # Without Postgres NOTIFY, seconds between data version polls for other workers' writes
+    SSE_VERSION_POLL = int(os.environ.get('SSE_VERSION_POLL', 5))
+
+    # Background report jobs: worker threads and on-disk artifact cache
+    REPORT_JOB_WORKERS = int(os.environ.get('REPORT_JOB_WORKERS', 2))
+    REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR')  # defaults to instance/report_cache
+    REPORT_CACHE_MAX_BYTES = int(os.environ.get('REPORT_CACHE_MAX_BYTES', 500 * 1024 * 1024))
+
+    # Rendered QR code images, named by payload hash
+    QR_CACHE_DIR = os.environ.get('QR_CACHE_DIR')  # defaults to instance/qr_cache
+
+    # QR label sheets: rendering processes (0 renders in-process) and default grid
+    LABEL_WORKERS = int(os.environ.get('LABEL_WORKERS', os.cpu_count() or 1))
+    LABEL_COLUMNS = int(os.environ.get('LABEL_COLUMNS', 3))
+    LABEL_ROWS = int(os.environ.get('LABEL_ROWS', 8))
+
+    # Seconds between incremental refreshes of the in-process serial -> asset id map
+    SCAN_SERIAL_REFRESH = int(os.environ.get('SCAN_SERIAL_REFRESH', 5))
+
     # Stock alert thresholds
     LOW_STOCK_THRESHOLD = {
         'A4': 5,
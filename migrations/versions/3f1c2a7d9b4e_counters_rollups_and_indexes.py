@@ -0,0 +1,124 @@
+"""Inventory counters, data version, daily rollups and list indexes
+
+Revision ID: 3f1c2a7d9b4e
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+Databases made before this revision were built with create_all, so each
+table and index is only created if it is missing.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2a7d9b4e'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns or expressions)
+INDEXES = [
+    ('ix_asset_name_id', 'asset', ['name', 'id']),
+    ('ix_asset_name_lower', 'asset', [sa.text('lower(name)')]),
+    ('ix_asset_serial_lower', 'asset', [sa.text('lower(serial_number)')]),
+    ('ix_asset_last_updated', 'asset', ['last_updated']),
+    ('ix_asset_transfer_date_id', 'asset_transfer', ['transfer_date', 'id']),
+    ('ix_asset_transfer_asset_date_id', 'asset_transfer', ['asset_id', 'transfer_date', 'id']),
+    ('ix_maintenance_asset_start_id', 'maintenance', ['asset_id', 'start_date', 'id']),
+    ('ix_checkout_checkout_date_id', 'checkout', ['checkout_date', 'id']),
+    ('ix_checkout_asset_date_id', 'checkout', ['asset_id', 'checkout_date', 'id']),
+]
+
+
+def _tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _indexes(table):
+    # Read from the catalogue: the inspector skips expression indexes on SQLite
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        query = "SELECT indexname FROM pg_indexes WHERE tablename = :table"
+    elif bind.dialect.name == 'sqlite':
+        query = "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"
+    else:
+        return {index['name'] for index in sa.inspect(bind).get_indexes(table)}
+    return set(bind.execute(sa.text(query), {'table': table}).scalars())
+
+
+def upgrade():
+    tables = _tables()
+
+    if 'inventory_counters' not in tables:
+        op.create_table(
+            'inventory_counters',
+            sa.Column('dimension', sa.String(length=32), nullable=False),
+            sa.Column('value', sa.String(length=100), nullable=False),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('dimension', 'value')
+        )
+
+    if 'inventory_data_version' not in tables:
+        op.create_table(
+            'inventory_data_version',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('version', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+
+    if 'daily_asset_rollup' not in tables:
+        op.create_table(
+            'daily_asset_rollup',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('snapshot_date', sa.Date(), nullable=False),
+            sa.Column('location', sa.String(length=50), nullable=True),
+            sa.Column('asset_type', sa.String(length=50), nullable=False),
+            sa.Column('status', sa.String(length=20), nullable=True),
+            sa.Column('count', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_daily_asset_rollup_date', 'daily_asset_rollup',
+                        ['snapshot_date', 'location', 'asset_type', 'status'])
+
+    if 'daily_stationery_rollup' not in tables:
+        op.create_table(
+            'daily_stationery_rollup',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('snapshot_date', sa.Date(), nullable=False),
+            sa.Column('stationery_id', sa.Integer(), nullable=False),
+            sa.Column('item_type', sa.String(length=50), nullable=False),
+            sa.Column('location', sa.String(length=50), nullable=True),
+            sa.Column('quantity', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index('ix_daily_stationery_rollup_snapshot_date', 'daily_stationery_rollup',
+                        ['snapshot_date'])
+
+    if 'daily_activity_rollup' not in tables:
+        op.create_table(
+            'daily_activity_rollup',
+            sa.Column('snapshot_date', sa.Date(), nullable=False),
+            sa.Column('open_checkouts', sa.Integer(), nullable=False),
+            sa.Column('open_maintenance', sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint('snapshot_date')
+        )
+
+    # Indexes on the original tables, where those tables exist
+    for name, table, columns in INDEXES:
+        if table in tables and name not in _indexes(table):
+            op.create_index(name, table, columns)
+
+
+def downgrade():
+    tables = _tables()
+
+    for name, table, columns in reversed(INDEXES):
+        if table in tables and name in _indexes(table):
+            op.drop_index(name, table_name=table)
+
+    for table in ('daily_activity_rollup', 'daily_stationery_rollup', 'daily_asset_rollup',
+                  'inventory_data_version', 'inventory_counters'):
+        if table in tables:
+            op.drop_table(table)
@@ -0,0 +1,57 @@
+"""Backfill and require transfer, checkout and maintenance dates
+
+Revision ID: 7a2e5c91d4f0
+Revises: 3f1c2a7d9b4e
+Create Date: 2026-10-19 09:00:00.000000
+
+History lists are keyset-paginated on these dates, and a row-value
+comparison never matches a NULL. Checkouts and maintenance records
+without a date take their created_at. Transfers have no creation time,
+so theirs are set to 1970-01-01 and they sort as the oldest.
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7a2e5c91d4f0'
+down_revision = '3f1c2a7d9b4e'
+branch_labels = None
+depends_on = None
+
+
+# (table, date column, backfill expression)
+DATE_COLUMNS = [
+    ('asset_transfer', 'transfer_date', None),
+    ('checkout', 'checkout_date', 'created_at'),
+    ('maintenance', 'start_date', 'created_at'),
+]
+
+UNDATED = datetime(1970, 1, 1)
+
+
+def upgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    for table, column, source in DATE_COLUMNS:
+        if table not in tables:
+            continue
+        date = sa.column(column, sa.DateTime)
+        fill = sa.column(source, sa.DateTime) if source else sa.literal(UNDATED, sa.DateTime)
+        op.execute(
+            sa.table(table, date, *([fill] if source else []))
+            .update().where(date.is_(None)).values({column: fill})
+        )
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+
+    for table, column, source in DATE_COLUMNS:
+        if table in tables:
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.alter_column(column, existing_type=sa.DateTime(), nullable=True)
@@ -0,0 +1,78 @@
+"""Case-folded asset name and serial number keys for typeahead lookups
+
+Revision ID: b5d08e3f6a21
+Revises: 7a2e5c91d4f0
+Create Date: 2026-10-19 10:00:00.000000
+
+Replaces the lower(name) / lower(serial_number) indexes: SQLite's lower()
+only folds ASCII, and a Postgres range scan over them depended on the
+database collation. The keys are str.casefold() values, compared by code
+point ("C" collation on Postgres).
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5d08e3f6a21'
+down_revision = '7a2e5c91d4f0'
+branch_labels = None
+depends_on = None
+
+
+def _key_type(length):
+    return sa.String(length).with_variant(postgresql.VARCHAR(length, collation='C'), 'postgresql')
+
+
+def _indexes():
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        query = "SELECT indexname FROM pg_indexes WHERE tablename = 'asset'"
+    else:
+        query = "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'asset'"
+    return set(bind.execute(sa.text(query)).scalars())
+
+
+def upgrade():
+    bind = op.get_bind()
+    if 'asset' not in sa.inspect(bind).get_table_names():
+        return
+    columns = {column['name'] for column in sa.inspect(bind).get_columns('asset')}
+
+    if 'name_key' not in columns:
+        op.add_column('asset', sa.Column('name_key', _key_type(100), nullable=True))
+    if 'serial_key' not in columns:
+        op.add_column('asset', sa.Column('serial_key', _key_type(50), nullable=True))
+
+    # casefold() has no SQL equivalent, so the keys are filled in from Python
+    asset = sa.table('asset', sa.column('id'), sa.column('name'), sa.column('serial_number'),
+                     sa.column('name_key'), sa.column('serial_key'))
+    rows = bind.execute(sa.select(asset.c.id, asset.c.name, asset.c.serial_number)).all()
+    if rows:
+        bind.execute(
+            asset.update().where(asset.c.id == sa.bindparam('asset_id'))
+            .values(name_key=sa.bindparam('name_key'), serial_key=sa.bindparam('serial_key')),
+            [{'asset_id': id, 'name_key': name.casefold() if name is not None else None,
+              'serial_key': serial.casefold() if serial is not None else None}
+             for id, name, serial in rows]
+        )
+
+    existing = _indexes()
+    for name in ('ix_asset_name_lower', 'ix_asset_serial_lower'):
+        if name in existing:
+            op.drop_index(name, table_name='asset')
+    if 'ix_asset_name_key' not in existing:
+        op.create_index('ix_asset_name_key', 'asset', ['name_key'])
+    if 'ix_asset_serial_key' not in existing:
+        op.create_index('ix_asset_serial_key', 'asset', ['serial_key'])
+
+
+def downgrade():
+    op.drop_index('ix_asset_serial_key', table_name='asset')
+    op.drop_index('ix_asset_name_key', table_name='asset')
+    with op.batch_alter_table('asset') as batch_op:
+        batch_op.drop_column('serial_key')
+        batch_op.drop_column('name_key')
+    op.create_index('ix_asset_name_lower', 'asset', [sa.text('lower(name)')])
+    op.create_index('ix_asset_serial_lower', 'asset', [sa.text('lower(serial_number)')])
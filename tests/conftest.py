@@ -0,0 +1,46 @@
+import pytest
+
+from app import create_app, db
+from app.scheduler import scheduler
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    WTF_CSRF_ENABLED = False
+    LABEL_WORKERS = 0
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app(TestConfig)
+    yield app
+    scheduler.shutdown(wait=False)
+
+
+@pytest.fixture
+def session(app):
+    """A fresh schema for each test, inside an app context."""
+    with app.app_context():
+        db.create_all()
+        yield db.session
+        db.session.remove()
+        db.drop_all()
+        # The SQLite search index is a virtual table outside the models
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql('DROP TABLE IF EXISTS asset_search')
+
+
+@pytest.fixture
+def client(app, session):
+    """A test client logged in as an admin user."""
+    from app.models import User
+    user = User(username='tester', email='tester@example.com', role='admin')
+    session.add(user)
+    session.commit()
+    client = app.test_client()
+    with client.session_transaction() as flask_session:
+        flask_session['_user_id'] = str(user.id)
+        flask_session['_fresh'] = True
+    return client
@@ -0,0 +1,38 @@
+from app import db
+from app.models import Asset
+
+
+def _asset(session, serial, parent=None):
+    asset = Asset(name=serial, serial_number=serial, asset_type='CPU', status='Available',
+                  parent_id=parent.id if parent else None)
+    session.add(asset)
+    session.commit()
+    return asset
+
+
+def test_delete_follows_components_and_stops_on_cycles(client, session):
+    top = _asset(session, 'TOP')
+    middle = _asset(session, 'MID', top)
+    bottom = _asset(session, 'BOT', middle)
+    keep = _asset(session, 'KEEP')
+    # A parent_id cycle must not make the recursive delete run forever
+    session.execute(db.update(Asset).where(Asset.id == top.id).values(parent_id=bottom.id))
+    session.commit()
+
+    response = client.post('/assets/batch/delete', json={'ids': [top.id, middle.id]})
+    assert response.status_code == 200
+    assert response.get_json() == {'matched': 3, 'changed': 3}
+    assert [asset.id for asset in Asset.query.all()] == [keep.id]
+
+
+def test_selection_rejects_bad_ids_and_filters(client, session):
+    _asset(session, 'A1')
+    for body in ({'ids': [True]}, {'ids': [2 ** 70]}, {'ids': [0]}, {'ids': [-1]},
+                 {'filter': {'location': ['x']}}, {'filter': {'colour': 'red'}}, {}):
+        response = client.post('/assets/batch/status', json=dict(body, status='Maintenance'))
+        assert response.status_code == 400, body
+    assert Asset.query.one().status == 'Available'
+
+    response = client.post('/assets/batch/status',
+                           json={'filter': {'location': None}, 'status': 'Maintenance'})
+    assert response.get_json() == {'matched': 1, 'changed': 1}
@@ -0,0 +1,87 @@
+from datetime import datetime
+
+from app.counters import (
+    READY_MARKER, compute_counters, counter_drift, counters_ready, read_counters, rebuild_counters
+)
+from app.dashboard import DashboardStats
+from app.models import Asset, Checkout, DataVersion, InventoryCounter, Maintenance, User, \
+    apply_counter_deltas, bump_data_version
+
+
+def _asset(session, serial, **fields):
+    asset = Asset(name=f'Asset {serial}', serial_number=serial,
+                  asset_type=fields.pop('asset_type', 'Monitor'), **fields)
+    session.add(asset)
+    session.commit()
+    return asset
+
+
+def test_flushes_keep_counters_in_step(session):
+    rebuild_counters()
+    user = User(username='u', email='u@example.com')
+    session.add(user)
+    first = _asset(session, 'A1', status='Available', location='Lab')
+    second = _asset(session, 'A2', status='Available', location='Lab', asset_type='CPU')
+
+    first.status = 'In-use'
+    second.location = 'Store'
+    checkout = Checkout(asset_id=first.id, user_id=user.id)
+    session.add_all([checkout, Maintenance(asset_id=second.id, status='Pending')])
+    session.commit()
+    checkout.actual_return = datetime.utcnow()
+    session.delete(second)
+    session.commit()
+
+    counters = read_counters()
+    assert counters[('status', 'In-use')] == 1
+    assert counters[('status', 'Available')] == 0
+    assert counters[('location', 'Store')] == 0
+    assert counters[('checkout', 'returned')] == 1
+    assert counters[('checkout', 'open')] == 0
+    assert counters[('maintenance_status', 'Pending')] == 1
+    assert counter_drift() == {}
+
+
+def test_deltas_upsert_new_and_existing_keys(session):
+    connection = session.connection()
+    apply_counter_deltas(connection, {('status', 'Lost'): 2, ('status', 'Found'): 0})
+    apply_counter_deltas(connection, {('status', 'Lost'): -1})
+    assert read_counters() == {('status', 'Lost'): 1}
+
+    bump_data_version(connection)
+    bump_data_version(connection)
+    assert session.get(DataVersion, 1).version == 2
+
+
+def test_drift_reports_stored_and_actual(session):
+    _asset(session, 'A1', status='Available')
+    rebuild_counters()
+    session.get(InventoryCounter, ('status', 'Available')).count = 5
+    session.commit()
+    assert counter_drift() == {('status', 'Available'): (5, 1)}
+
+    rebuild_counters()
+    assert counter_drift() == {}
+
+
+def test_dashboard_waits_for_the_ready_marker(session):
+    _asset(session, 'A1', status='Available')
+    # Flushes before any rebuild only add deltas to an empty table
+    session.query(InventoryCounter).delete()
+    session.commit()
+    _asset(session, 'A2', status='Available')
+    assert not counters_ready(read_counters())
+    assert DashboardStats.collect().status_counts['Available'] == 2
+
+    counts = rebuild_counters()
+    assert READY_MARKER not in counts
+    assert counters_ready(read_counters())
+    assert read_counters()[('status', 'Available')] == 2 == compute_counters()[('status', 'Available')]
+    assert DashboardStats.collect().status_counts['Available'] == 2
+
+
+def test_rebuild_removes_stale_keys(session):
+    apply_counter_deltas(session.connection(), {('location', 'Gone'): 3})
+    session.commit()
+    rebuild_counters()
+    assert ('location', 'Gone') not in read_counters()
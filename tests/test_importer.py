@@ -0,0 +1,38 @@
+import io
+
+import pytest
+
+from app.assets.importer import import_assets
+from app.models import Asset
+
+
+def _import(text, **kwargs):
+    return import_assets(io.BytesIO(text.encode()), 'assets.csv', **kwargs)
+
+
+HEADER = 'name,serial_number,asset_type,location,status\n'
+
+
+def test_header_is_checked_before_rows(session):
+    with pytest.raises(ValueError, match='serial_number'):
+        _import('name,asset_type,location,status\n')
+    with pytest.raises(ValueError, match='status'):
+        _import('name,serial_number,asset_type,location\nMonitor,SN-1,monitor,,\n')
+
+
+def test_short_row_is_a_row_error_not_a_header_error(session):
+    result = _import(HEADER + 'Short,SN-1\n')
+    assert result.rows_read == 1
+    assert result.inserted == 0
+    assert result.errors[0][0] == 2
+    assert 'asset_type is required' in result.errors[0][1]
+
+    assert _import(HEADER).rows_read == 0
+    assert Asset.query.count() == 0
+
+
+def test_valid_rows_are_inserted_with_lookup_keys(session):
+    result = _import(HEADER + 'Ünit Monitor,SN-1,monitor,masakin,available\n')
+    assert (result.inserted, result.error_count) == (1, 0)
+    asset = Asset.query.one()
+    assert (asset.asset_type, asset.location, asset.name_key) == ('Monitor', 'Masakin', 'ünit monitor')
@@ -0,0 +1,33 @@
+from app.models import Asset
+
+
+def _assets(session, *pairs):
+    session.add_all([
+        Asset(name=name, serial_number=serial, asset_type='Monitor') for name, serial in pairs
+    ])
+    session.commit()
+
+
+def _labels(client, q):
+    response = client.get('/assets/lookup', query_string={'q': q})
+    assert response.status_code == 200
+    return [item['name'] for item in response.get_json()]
+
+
+def test_lookup_folds_case_beyond_ascii(client, session):
+    _assets(session, ('Ünit Alpha', 'SN-1'), ('unit beta', 'SN-2'), ('Straße Sign', 'SN-3'))
+    assert _labels(client, 'ü') == ['Ünit Alpha']
+    assert _labels(client, 'ÜNIT') == ['Ünit Alpha']
+    assert _labels(client, 'UNIT') == ['unit beta']
+    assert _labels(client, 'STRASSE') == ['Straße Sign']
+
+
+def test_lookup_matches_serials_and_tracks_renames(client, session):
+    _assets(session, ('Printer', 'ABC-100'), ('Scanner', 'abd-200'))
+    assert _labels(client, 'ab') == ['Printer', 'Scanner']
+
+    printer = Asset.query.filter_by(serial_number='ABC-100').one()
+    printer.name = 'Plotter'
+    session.commit()
+    assert _labels(client, 'plo') == ['Plotter']
+    assert _labels(client, 'pri') == []
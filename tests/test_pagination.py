@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app import db
+from app.models import Asset, AssetTransfer, Checkout, User
+from app.pagination import keyset_paginate
+
+
+def _statements(callback):
+    """Run callback and return the (sql, params) it sent to the database."""
+    seen = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        seen.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        callback()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return seen
+
+
+def _plan(statement, parameters):
+    rows = db.session.connection().exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)
+    return ' '.join(row[-1] for row in rows)
+
+
+def _history(session, count):
+    user = User(username='tech', email='tech@example.com')
+    asset = Asset(name='Monitor', serial_number='SN-1', asset_type='Monitor')
+    session.add_all([user, asset])
+    session.flush()
+    start = datetime(2026, 1, 1)
+    for i in range(count):
+        session.add(AssetTransfer(asset_id=asset.id, from_location='A', to_location='B',
+                                  transferred_by=user.id, transfer_date=start + timedelta(hours=i)))
+        session.add(Checkout(asset_id=asset.id, user_id=user.id,
+                             checkout_date=start + timedelta(hours=i)))
+    session.commit()
+
+
+def test_pages_cover_every_row_once(session):
+    _history(session, 7)
+    keys = [AssetTransfer.transfer_date, AssetTransfer.id]
+
+    seen, cursor = [], None
+    while True:
+        page = keyset_paginate(AssetTransfer.query, keys, cursor, per_page=3, descending=True)
+        seen.extend(t.id for t in page.items)
+        if not page.has_next:
+            break
+        cursor = page.next_cursor
+    assert seen == list(range(7, 0, -1))
+
+    back = keyset_paginate(AssetTransfer.query, keys, page.prev_cursor, per_page=3, descending=True)
+    assert [t.id for t in back.items] == [4, 3, 2]
+
+
+def test_history_pages_seek_on_the_date_index(session):
+    _history(session, 5)
+    for model, keys, index in (
+        (AssetTransfer, [AssetTransfer.transfer_date, AssetTransfer.id], 'ix_asset_transfer_date_id'),
+        (Checkout, [Checkout.checkout_date, Checkout.id], 'ix_checkout_checkout_date_id'),
+    ):
+        first = keyset_paginate(model.query, keys, per_page=2, descending=True)
+        statements = _statements(
+            lambda: keyset_paginate(model.query, keys, first.next_cursor, per_page=2, descending=True))
+        plan = _plan(*statements[-1])
+        assert index in plan
+        assert 'TEMP B-TREE' not in plan
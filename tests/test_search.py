@@ -0,0 +1,42 @@
+from app import db, search
+from app.models import Asset
+from app.search import LikeSearch, SQLiteFTSSearch, asset_search, rebuild_search_index, \
+    search_assets
+
+
+def _names(term):
+    query, keys, descending = search_assets(Asset.query, term)
+    return sorted(asset.name for asset in query)
+
+
+def _assets(session):
+    session.add_all([
+        Asset(name='Dell Monitor', serial_number='DM-1', asset_type='Monitor'),
+        Asset(name='HP Printer', serial_number='HP-1', asset_type='Printer'),
+    ])
+    session.commit()
+
+
+def test_falls_back_to_like_without_fts5(app, monkeypatch):
+    monkeypatch.setattr(SQLiteFTSSearch, 'supported', lambda self, connection: False)
+    monkeypatch.setattr(search, '_backend', None)
+    with app.app_context():
+        db.create_all()
+        try:
+            _assets(db.session)
+            assert type(asset_search()) is LikeSearch
+            assert _names('monit') == ['Dell Monitor']
+        finally:
+            db.session.remove()
+            db.drop_all()
+
+
+def test_like_fallback_is_rechecked_after_a_rebuild_elsewhere(session, monkeypatch):
+    _assets(session)
+    # As if this worker looked before the index existed, long enough ago
+    monkeypatch.setattr(search, '_backend', LikeSearch())
+    monkeypatch.setattr(search, '_backend_checked', -search.FALLBACK_RECHECK_SECONDS)
+    rebuild_search_index()
+    monkeypatch.setattr(search, '_backend', LikeSearch())
+    assert isinstance(asset_search(), SQLiteFTSSearch)
+    assert _names('printer') == ['HP Printer']
@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.models import Asset, Checkout
+from app.reports.utilization import UtilizationReport, busy_seconds
+
+
+def test_busy_seconds_counts_overlaps_once():
+    asset_index = np.array([0, 0, 0, 1])
+    starts = np.array([0, 5, 20, 3])
+    ends = np.array([10, 8, 30, 4])
+    assert busy_seconds(asset_index, starts, ends, 3).tolist() == [20, 1, 0]
+
+
+def test_report_reads_epoch_seconds_from_sql(session):
+    start = datetime(2026, 3, 1)
+    end = start + timedelta(days=1)
+    first = Asset(name='First', serial_number='U-1', asset_type='CPU', location='Lab')
+    second = Asset(name='Second', serial_number='U-2', asset_type='CPU', location='Lab')
+    session.add_all([first, second])
+    session.flush()
+    session.add_all([
+        # Clipped to the window start; fractional seconds are truncated
+        Checkout(asset_id=first.id, checkout_date=start - timedelta(hours=1),
+                 actual_return=start + timedelta(hours=2, microseconds=999999)),
+        Checkout(asset_id=first.id, checkout_date=start + timedelta(hours=1, microseconds=999999),
+                 actual_return=start + timedelta(hours=3)),
+        # Still open: runs to the end of the window
+        Checkout(asset_id=second.id, checkout_date=start + timedelta(hours=18)),
+        # Outside the window
+        Checkout(asset_id=second.id, checkout_date=end, actual_return=end + timedelta(hours=1)),
+    ])
+    session.commit()
+
+    report = UtilizationReport(start, end)
+    assert report.busy.tolist() == [3 * 3600, 6 * 3600]
+    assert report.overall() == (9 * 3600) / (2 * 86400)